@@ -28,6 +28,12 @@ class Bill(model_util.PermissionHelperMixin, model_util.StructureMoelMixin, mode
     class Meta:
         verbose_name = "票据库"
         verbose_name_plural = verbose_name
+        default_manager_name = "all_objects"  # 唯一性校验等不跳过已删除数据，见 StructureMoelMixin
+        base_manager_name = "all_objects"
+        # 索引以软删除标记开头，MySQL 不支持部分索引，用组合索引代替
+        indexes = [
+            models.Index(fields=["is_delete", "create_time"], name="bill_live_create_time_idx"),
+        ]
     
     def __str__(self) -> str:
         return self.name
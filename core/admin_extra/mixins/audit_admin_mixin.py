@@ -7,6 +7,10 @@
 # version    : python 3.11
 # Description: 审计字段自动处理
 """
+from django.db import transaction
+from django.utils import timezone
+from ..signals import after_soft_delete_signal
+
 
 class AuditAdminMixin:
     audit_exclude_fields = (
@@ -19,6 +23,7 @@ class AuditAdminMixin:
         "is_delete",
     )
     exclude_fields = tuple()
+    soft_delete_send_signal = False  # 批量软删除后是否逐条发送 after_soft_delete_signal
 
     def get_form(self, request, obj=None, **kwargs):
         """在form中去掉字段"""
@@ -43,13 +48,29 @@ class AuditAdminMixin:
         super().save_model(request, obj, form, change)
 
     def delete_model(self, request, obj):
-        from django.utils import timezone
-
         obj.is_delete = True
         obj.delete_user = request.user
         obj.delete_time = timezone.now()
         obj.save()
 
     def delete_queryset(self, request, queryset):
-        for obj in queryset:
-            self.delete_model(request, obj)
\ No newline at end of file
+        """
+        批量软删除：一条 UPDATE 标记删除，不逐条 save，不触发 pre_save/post_save
+        删除日志由 admin 的 delete_selected 通过 log_deletions 批量写入
+        """
+        delete_user = request.user
+        delete_time = timezone.now()
+        with transaction.atomic():
+            if not self.soft_delete_send_signal:
+                queryset.update(is_delete=True, delete_user=delete_user, delete_time=delete_time)
+                return
+
+            objs = list(queryset.select_for_update())
+            queryset.model._default_manager.filter(pk__in=[obj.pk for obj in objs]).update(
+                is_delete=True, delete_user=delete_user, delete_time=delete_time
+            )
+            for obj in objs:
+                obj.is_delete = True
+                obj.delete_user = delete_user
+                obj.delete_time = delete_time
+                after_soft_delete_signal.send(sender=queryset.model, instance=obj, user=delete_user)
@@ -0,0 +1,13 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : signals.py
+# Time       : 2025-10-18 10:12:36
+# Author     : lyx
+# version    : python 3.11
+# Description: admin 扩展信号定义
+"""
+from django.dispatch import Signal
+
+# admin 批量软删除后逐条发送（需在 ModelAdmin 上开启 soft_delete_send_signal），参数 instance 为被删除对象，user 为操作人
+after_soft_delete_signal = Signal()
@@ -8,9 +8,13 @@
 # Description: 信号监听器
 """
 from django.dispatch import receiver
-from django.contrib.auth.signals import user_logged_in
+from django.contrib.auth.models import Group, Permission
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.http import HttpRequest
-from core.utils import signal_util
+from core.auth.models import SimpleuiMenus, User
+from core.conf import settings
+from core.utils import signal_util, simpleui_util, token_util, user_util
 
 @receiver(user_logged_in)
 @signal_util.safe_signal_handler
@@ -20,4 +24,80 @@ def my_handler(sender, request: HttpRequest, user, **kwargs):
     只在 admin 登录时设置一个标志，后续中间件会用这个标志写 cookie
     """
     if request.path.startswith('/admin/login/'):
-        request.admin_login_success = True
\ No newline at end of file
+        request.admin_login_success = True
+
+
+@receiver(user_logged_out)
+@signal_util.safe_signal_handler
+def revoke_token_on_logout(sender, request: HttpRequest, user, **kwargs):
+    """
+    Django 退出登录信号处理
+    撤销请求携带的 token，已缓存的校验结果同时失效
+    """
+    if request is None:
+        return
+    token = token_util.tk_handler_dict[settings.TOKEN_ORIGIN].get(request, settings.TOKEN_TAG)
+    if token:
+        token_util.revoke_token(token)
+
+
+@receiver([post_save, post_delete], sender=User)
+@signal_util.safe_signal_handler
+def invalidate_user_cache(sender, instance: User, **kwargs):
+    """用户修改、删除后 token 用户缓存、菜单树失效"""
+    user_util.user_cache.invalidate(instance.pk)
+    simpleui_util.invalidate_user_menus(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@signal_util.safe_signal_handler
+def invalidate_user_cache_on_m2m(sender, instance, action: str, reverse: bool, pk_set, **kwargs):
+    """
+    用户的权限组、权限变更后 token 用户缓存、菜单树失效
+    正向（user.groups.add）instance 为用户；反向（group.user_set.add）pk_set 为用户 id，clear 时 pk_set 为空，清空全部
+    """
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        user_util.user_cache.invalidate(instance.pk)
+        simpleui_util.invalidate_user_menus(instance.pk)
+    elif pk_set:
+        user_util.user_cache.invalidate(*pk_set)
+        simpleui_util.invalidate_user_menus(*pk_set)
+    else:
+        user_util.user_cache.clear()
+        simpleui_util.clear_user_menus()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+@signal_util.safe_signal_handler
+def clear_user_cache_on_group_permissions(sender, action: str, **kwargs):
+    """权限组的权限变更影响组内所有用户，清空 token 用户缓存、菜单树"""
+    if action.startswith("post_"):
+        user_util.user_cache.clear()
+        simpleui_util.clear_user_menus()
+
+
+@receiver(post_delete, sender=Group)
+@signal_util.safe_signal_handler
+def clear_user_cache_on_group_delete(sender, **kwargs):
+    """删除权限组不会触发 m2m_changed，清空 token 用户缓存、菜单树"""
+    user_util.user_cache.clear()
+    simpleui_util.clear_user_menus()
+
+
+@receiver([post_save, post_delete], sender=SimpleuiMenus)
+@receiver([post_save, post_delete], sender=Permission)
+@signal_util.safe_signal_handler
+def clear_menus_on_change(sender, **kwargs):
+    """菜单、权限修改或删除后重新加载菜单，清空所有用户的菜单树"""
+    simpleui_util.clear_menus()
+
+
+@receiver(m2m_changed, sender=SimpleuiMenus.permissions.through)
+@signal_util.safe_signal_handler
+def clear_menus_on_permissions(sender, action: str, **kwargs):
+    """菜单权限变更后重新加载菜单，清空所有用户的菜单树"""
+    if action.startswith("post_"):
+        simpleui_util.clear_menus()
@@ -0,0 +1,32 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : simpleui_menus.py
+# Time       : 2025-10-19 02:31:44
+# Author     : lyx
+# version    : python 3.11
+# Description: simpleui 动态菜单标签，按当前用户注入菜单，不修改全局的 SIMPLEUI_CONFIG
+"""
+from django import template
+from simpleui.templatetags import simpletags
+
+from core.conf import settings
+from core.utils import simpleui_util
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def user_menus(context):
+    """替换 simpleui 的 menus 标签，SIMPLEUI_CONFIG 的 menus 换成当前用户的菜单树"""
+    request = context.request
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return simpletags.menus(context)
+
+    config = {**settings.SIMPLEUI_CONFIG, "menus": simpleui_util.get_user_menus(user)}
+
+    def get_config(name):
+        return config if name == "SIMPLEUI_CONFIG" else simpletags.get_config(name)
+
+    return simpletags.menus(context, _get_config=get_config)
@@ -1,26 +1,59 @@
+import logging
+import os
+import socket
 import time
 import random
 import threading
-from django.db import IntegrityError, transaction
-from .models import SerialNumber
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from core.conf import settings
+from .models import SerialNumber, SerialNumberArchive, SerialNumberSegment, SerialNumberWorker
+
+logger = logging.getLogger(__name__)
 
 class SerialNumberGenerator:
     DIGITS = "0123456789"
     LETTERS = "ABCDEFGHJKLMNOPQRSTUVWXYZ"
 
+    MODE_RANDOM = "random"    # 随机生成，逐条写入 SerialNumber 表校验唯一
+    MODE_SEGMENT = "segment"  # 号段模式，一次租用一段连续号码，在内存中发放
+    MODE_SNOWFLAKE = "snowflake"  # 雪花模式，毫秒时间戳 + 机器号 + 计数器，不写数据库
+
+    BATCH_SIZE = 1000  # 随机模式批量写入、回查的单批数量
+
+    # 雪花模式：41位毫秒时间戳 + 8位机器号 + 16位计数器，最大值为20位十进制数
+    SNOWFLAKE_EPOCH_MS = 1735660800000  # 2025-01-01 00:00:00 +08:00
+    SNOWFLAKE_WORKER_BITS = 8
+    SNOWFLAKE_COUNTER_BITS = 16
+    SNOWFLAKE_DIGITS = 20
+
     def __init__(self):
         self._lock = threading.Lock()
         self._counter = random.randint(0, 0xFFFF)
+        self._segments: dict[str, list[int]] = {}  # 号段标识 -> [下一个可用值, 号段最大值]
+
+        # 雪花模式状态
+        self._last_ts = 0  # 上一次使用的毫秒时间戳
+        self._ts_used = 0  # 当前毫秒已使用的计数器数量
+        self._worker_lock = threading.Lock()
+        self._worker_id: int = None
+        self._worker_renew_at = 0.0
+        self._worker_owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
 
     def next_id(
         self,
         prefix: str = "SN",
         used_for: str = None,
         length: int = 16,
-        letter_length: int = 4
+        letter_length: int = 4,
+        mode: str = None,
     ) -> str:
         """生成单个唯一流水号"""
-        return self.next_ids(1, prefix, used_for, length, letter_length)[0]
+        return self.next_ids(1, prefix, used_for, length, letter_length, mode)[0]
 
     def next_ids(
         self,
@@ -28,9 +61,13 @@ class SerialNumberGenerator:
         prefix: str = "SN",
         used_for: str = None,
         length: int = 16,
-        letter_length: int = 4
+        letter_length: int = 4,
+        mode: str = None,
     ) -> list[str]:
-        """生成多个唯一流水号"""
+        """
+        生成多个唯一流水号
+        mode 为空时按 settings.SERIAL_NUMBER_MODES[used_for] 选择生成模式，默认 random
+        """
         if count <= 0:
             raise ValueError("count 必须大于 0")
         if length <= 0:
@@ -38,6 +75,32 @@ class SerialNumberGenerator:
         if letter_length < 0 or letter_length > length:
             raise ValueError("letter_length 必须在 0 ~ length 之间")
 
+        mode = mode or self.get_mode(used_for)
+        if mode == self.MODE_RANDOM:
+            return self._next_random_ids(count, prefix, used_for, length, letter_length)
+        if mode == self.MODE_SEGMENT:
+            return self._next_segment_ids(count, prefix, length, letter_length)
+        if mode == self.MODE_SNOWFLAKE:
+            return self._next_snowflake_ids(count, prefix, length, letter_length)
+        raise ValueError(f"不支持的流水号生成模式: {mode}")
+
+    @staticmethod
+    def get_mode(used_for: str = None) -> str:
+        """获取 used_for 对应的生成模式"""
+        return settings.SERIAL_NUMBER_MODES.get(used_for, SerialNumberGenerator.MODE_RANDOM)
+
+    def _next_random_ids(
+        self,
+        count: int,
+        prefix: str,
+        used_for: str,
+        length: int,
+        letter_length: int,
+    ) -> list[str]:
+        """
+        随机生成流水号，并写入 SerialNumber 表保证唯一
+        每轮候选号一次批量写入（忽略冲突），再按批次号回查写入成功的号码，只为冲突的号码重新生成
+        """
         digit_length = length - letter_length
         result = []
         max_attempts = 1000  # 总尝试次数，防止死循环
@@ -45,48 +108,251 @@ class SerialNumberGenerator:
         attempts = 0
         while len(result) < count and attempts < max_attempts:
             attempts += 1
-            batch_sn = []
-
-            # 先生成候选流水号
-            for _ in range(count - len(result)):
-                with self._lock:
-                    ts_ms = int(time.time() * 1000) & ((1 << 48) - 1)
-                    self._counter = (self._counter + 1) & 0xFFFF
-                    ctr = self._counter
-
-                # 数字部分
-                rnd_digits = random.getrandbits(digit_length * 4)
-                digit_str = self._encode(rnd_digits, self.DIGITS)
-                if len(digit_str) < digit_length:
-                    digit_str = self.DIGITS[0] * (digit_length - len(digit_str)) + digit_str
-                else:
-                    digit_str = digit_str[-digit_length:]
-
-                # 字母部分
-                letter_str = "".join(random.choice(self.LETTERS) for _ in range(letter_length))
-
-                # 混合字母数字
-                all_chars = list(digit_str + letter_str)
-                random.shuffle(all_chars)
-                sn_body = "".join(all_chars)
-                sn = f"{prefix}{sn_body}"
-                batch_sn.append(sn)
-
-            # 批量写入数据库
-            try:
-                with transaction.atomic():
-                    for sn in batch_sn:
-                        SerialNumber.objects.create(sn=sn, used_for=used_for)
-                    result.extend(batch_sn)
-            except IntegrityError:
-                # 部分冲突，重新生成冲突的数量
+
+            # 先生成候选流水号，同一批次内去重
+            batch_sn = set()
+            while len(batch_sn) < count - len(result):
+                batch_sn.add(f"{prefix}{self._random_body(digit_length, letter_length)}")
+            # 已归档的号码不在 SerialNumber 表中，需要通过归档表的唯一索引排除
+            batch_sn = list(batch_sn)
+            archived = set()
+            for i in range(0, len(batch_sn), self.BATCH_SIZE):
+                archived.update(
+                    SerialNumberArchive.objects.filter(
+                        sn__in=batch_sn[i : i + self.BATCH_SIZE]
+                    ).values_list("sn", flat=True)
+                )
+            batch_sn = [sn for sn in batch_sn if sn not in archived]
+            if not batch_sn:
                 continue
 
+            # 批量写入数据库，已存在的号码直接忽略
+            batch_no = uuid.uuid4().hex
+            SerialNumber.objects.bulk_create(
+                [SerialNumber(sn=sn, used_for=used_for, batch_no=batch_no) for sn in batch_sn],
+                batch_size=self.BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+
+            # 回查本批次写入成功的号码，冲突的号码进入下一轮重新生成
+            landed = set()
+            for i in range(0, len(batch_sn), self.BATCH_SIZE):
+                landed.update(
+                    SerialNumber.objects.filter(
+                        sn__in=batch_sn[i : i + self.BATCH_SIZE], batch_no=batch_no
+                    ).values_list("sn", flat=True)
+                )
+            result.extend(sn for sn in batch_sn if sn in landed)
+
+            if len(landed) < len(batch_sn):
+                logger.warning(
+                    f"流水号冲突 - used_for:[{used_for}]; 冲突数量:[{len(batch_sn) - len(landed)}]; "
+                    f"冲突号码:{[sn for sn in batch_sn if sn not in landed][:10]}"
+                )
+
         if len(result) < count:
             raise RuntimeError(f"生成唯一流水号失败：期望 {count} 个，实际生成 {len(result)} 个")
 
         return result
 
+    def _random_body(self, digit_length: int, letter_length: int) -> str:
+        """随机生成流水号主体（不含前缀）"""
+        with self._lock:
+            ts_ms = int(time.time() * 1000) & ((1 << 48) - 1)
+            self._counter = (self._counter + 1) & 0xFFFF
+            ctr = self._counter
+
+        # 数字部分
+        rnd_digits = random.getrandbits(digit_length * 4)
+        digit_str = self._encode(rnd_digits, self.DIGITS)
+        if len(digit_str) < digit_length:
+            digit_str = self.DIGITS[0] * (digit_length - len(digit_str)) + digit_str
+        else:
+            digit_str = digit_str[-digit_length:]
+
+        return self._mix_letters(digit_str, letter_length)
+
+    def _next_segment_ids(
+        self,
+        count: int,
+        prefix: str,
+        length: int,
+        letter_length: int,
+    ) -> list[str]:
+        """
+        号段模式生成流水号
+        同一前缀、同一数字位数共用一个号段，数字部分全局唯一，字母只做混合不参与唯一性判断
+        """
+        digit_length = length - letter_length
+        biz_key = f"{prefix}:{digit_length}"
+
+        with self._lock:
+            values = self._take_from_segment(biz_key, count)
+
+        missing = count - len(values)
+        if missing:
+            step = max(missing, settings.SERIAL_NUMBER_SEGMENT_STEP)
+            # 在独立线程（独立数据库连接、自动提交）中租用，号段行锁不会持有到调用方事务结束
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                start, end = executor.submit(self._lease_segment, biz_key, step).result()
+            if end >= 10 ** digit_length:
+                raise RuntimeError(f"流水号号段[{biz_key}]已耗尽，请增加流水号长度")
+            values.extend(range(start, start + missing))
+            if start + missing <= end:
+                # 号段租用已独立提交，剩余号码不受调用方事务回滚影响，可直接在内存中继续发放
+                self._put_segment(biz_key, start + missing, end)
+
+        return [
+            f"{prefix}{self._mix_letters(str(value).zfill(digit_length), letter_length)}"
+            for value in values
+        ]
+
+    def _take_from_segment(self, biz_key: str, count: int) -> list[int]:
+        """从内存号段中取号，调用方需持有锁"""
+        segment = self._segments.get(biz_key)
+        if not segment:
+            return []
+        next_value, end = segment
+        take = min(count, end - next_value + 1)
+        segment[0] = next_value + take
+        if segment[0] > end:
+            del self._segments[biz_key]
+        return list(range(next_value, next_value + take))
+
+    def _put_segment(self, biz_key: str, start: int, end: int):
+        with self._lock:
+            self._segments[biz_key] = [start, end]
+
+    @staticmethod
+    def _lease_segment(biz_key: str, step: int) -> tuple[int, int]:
+        """在数据库中租用一段号码，返回 (起始值, 结束值)，在独立线程中调用，结束时关闭该线程的数据库连接"""
+        segments = SerialNumberSegment.objects.filter(biz_key=biz_key)
+        try:
+            with transaction.atomic():
+                updated = segments.update(max_value=F("max_value") + step, update_time=timezone.now())
+                if not updated:
+                    try:
+                        with transaction.atomic():
+                            SerialNumberSegment.objects.create(biz_key=biz_key, max_value=0)
+                    except IntegrityError:
+                        # 其他进程已经创建了号段
+                        pass
+                    segments.update(max_value=F("max_value") + step, update_time=timezone.now())
+                max_value = segments.values_list("max_value", flat=True).get()
+        finally:
+            connection.close()
+        return max_value - step + 1, max_value
+
+    def _next_snowflake_ids(
+        self,
+        count: int,
+        prefix: str,
+        length: int,
+        letter_length: int,
+    ) -> list[str]:
+        """
+        雪花模式生成流水号，由构造保证唯一，不写 SerialNumber 表
+        数字部分不足20位时按20位生成
+        """
+        digit_length = max(length - letter_length, self.SNOWFLAKE_DIGITS)
+        worker_id = self._get_worker_id()
+
+        with self._lock:
+            values = [self._next_snowflake_value(worker_id) for _ in range(count)]
+
+        return [
+            f"{prefix}{self._mix_letters(str(value).zfill(digit_length), letter_length)}"
+            for value in values
+        ]
+
+    def _next_snowflake_value(self, worker_id: int) -> int:
+        """生成单个雪花值，调用方需持有锁"""
+        # 时钟回拨时沿用上一次的时间戳
+        ts_ms = max(int(time.time() * 1000), self._last_ts)
+        if ts_ms != self._last_ts:
+            self._last_ts = ts_ms
+            self._ts_used = 0
+        elif self._ts_used > self._counter_mask:
+            # 同一毫秒内计数器已用尽，借用下一毫秒
+            self._last_ts += 1
+            self._ts_used = 0
+
+        self._counter = (self._counter + 1) & self._counter_mask
+        self._ts_used += 1
+        return (
+            (self._last_ts - self.SNOWFLAKE_EPOCH_MS)
+            << (self.SNOWFLAKE_WORKER_BITS + self.SNOWFLAKE_COUNTER_BITS)
+            | worker_id << self.SNOWFLAKE_COUNTER_BITS
+            | self._counter
+        )
+
+    @property
+    def _counter_mask(self) -> int:
+        return (1 << self.SNOWFLAKE_COUNTER_BITS) - 1
+
+    def _get_worker_id(self) -> int:
+        """获取机器号，首次使用时租用，租约过半后续约"""
+        if self._worker_id is None or time.time() >= self._worker_renew_at:
+            with self._worker_lock:
+                if self._worker_id is None or time.time() >= self._worker_renew_at:
+                    # 在独立线程（独立数据库连接）中租用，不受调用方事务回滚影响
+                    with ThreadPoolExecutor(max_workers=1) as executor:
+                        self._worker_id = executor.submit(self._lease_worker, self._worker_id).result()
+                    self._worker_renew_at = time.time() + settings.SERIAL_NUMBER_WORKER_LEASE_SECONDS / 2
+        return self._worker_id
+
+    def _lease_worker(self, worker_id: int = None) -> int:
+        """续约或租用一个机器号"""
+        try:
+            now = timezone.now()
+            expire_time = now + timedelta(seconds=settings.SERIAL_NUMBER_WORKER_LEASE_SECONDS)
+            workers = SerialNumberWorker.objects
+
+            # 续约当前机器号
+            if worker_id is not None and workers.filter(
+                worker_id=worker_id, owner=self._worker_owner
+            ).update(expire_time=expire_time):
+                return worker_id
+
+            # 初始化机器号
+            max_workers = 1 << self.SNOWFLAKE_WORKER_BITS
+            if workers.count() < max_workers:
+                workers.bulk_create(
+                    [SerialNumberWorker(worker_id=i, expire_time=now) for i in range(max_workers)],
+                    ignore_conflicts=True,
+                )
+
+            # 租用已到期的机器号，条件更新保证同一机器号只会被一个进程租到
+            candidates = workers.filter(expire_time__lte=now).order_by("expire_time").values_list("worker_id", flat=True)
+            for candidate in candidates[:16]:
+                if workers.filter(worker_id=candidate, expire_time__lte=now).update(
+                    owner=self._worker_owner, expire_time=expire_time
+                ):
+                    logger.info(f"流水号机器号租用成功 - worker_id:[{candidate}]; owner:[{self._worker_owner}]")
+                    return candidate
+            raise RuntimeError("没有可用的流水号机器号")
+        finally:
+            connection.close()
+
+    def _mix_letters(self, digit_str: str, letter_length: int) -> str:
+        """
+        随机混合字母与数字
+        字母插入到随机位置，数字保持原有顺序，保证数字部分不同的流水号混合后仍然不同
+        """
+        if not letter_length:
+            return digit_str
+
+        # 字母部分
+        letters = iter(random.choice(self.LETTERS) for _ in range(letter_length))
+        letter_positions = set(random.sample(range(len(digit_str) + letter_length), letter_length))
+
+        # 混合字母数字
+        digits = iter(digit_str)
+        return "".join(
+            next(letters) if i in letter_positions else next(digits)
+            for i in range(len(digit_str) + letter_length)
+        )
+
     @staticmethod
     def _encode(value: int, alphabet: str) -> str:
         if value == 0:
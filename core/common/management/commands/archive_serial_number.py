@@ -0,0 +1,103 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : archive_serial_number.py
+# Time       : 2025-09-21 09:30:45
+# Author     : lyx
+# version    : python 3.11
+# Description: 流水号归档，将过期的流水号分批移动到归档表
+"""
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.db import transaction
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.common.models import SerialNumber, SerialNumberArchive
+
+
+class Command(BaseCommand):
+    help = "将创建时间早于指定天数的流水号分批移动到归档表，归档后的流水号仍参与唯一性校验"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            default=180,
+            type=int,
+            help="归档多少天以前的流水号, 默认180",
+        )
+        parser.add_argument(
+            "--batch-size",
+            default=2000,
+            type=int,
+            help="每批归档数量, 默认2000",
+        )
+        parser.add_argument(
+            "--sleep",
+            default=0.0,
+            type=float,
+            help="每批之间的休眠秒数, 用于降低对线上业务的影响, 默认0",
+        )
+        parser.add_argument(
+            "--used-for",
+            default=None,
+            type=str,
+            help="只归档指定用途的流水号, 默认全部",
+        )
+
+    def handle(self, *args, **options):
+        horizon = timezone.now() - timedelta(days=options["days"])
+        batch_size = options["batch_size"]
+        queryset = SerialNumber.objects.filter(created_at__lt=horizon)
+        if options["used_for"]:
+            queryset = queryset.filter(used_for=options["used_for"])
+
+        self.stdout.write(f"开始归档 {horizon:%Y-%m-%d %H:%M:%S} 以前的流水号, 每批 {batch_size} 条")
+
+        total = 0
+        groups = Counter()
+        start = time.perf_counter()
+        while True:
+            batch_start = time.perf_counter()
+            archived = self.archive_batch(queryset, batch_size)
+            if not archived:
+                break
+
+            total += len(archived)
+            groups.update((row.used_for, row.month) for row in archived)
+            cost = time.perf_counter() - batch_start
+            self.stdout.write(f"已归档 {total} 条, 本批 {len(archived)} 条, 耗时 {cost * 1000:.1f}ms")
+
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        cost = time.perf_counter() - start
+        for (used_for, month), count in sorted(groups.items(), key=lambda item: (str(item[0][0]), item[0][1])):
+            self.stdout.write(f"  {used_for or '-'} {month}: {count} 条")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"归档完成, 共 {total} 条, 耗时 {cost:.2f}s, 吞吐 {total / cost if cost else 0:.0f} 条/s"
+            )
+        )
+
+    @staticmethod
+    def archive_batch(queryset, batch_size: int) -> list[SerialNumberArchive]:
+        """在短事务中归档一批流水号：写入归档表后删除原记录"""
+        with transaction.atomic():
+            rows = list(queryset.order_by("id").values_list("id", "sn", "used_for", "created_at")[:batch_size])
+            if not rows:
+                return []
+
+            archived = [
+                SerialNumberArchive(
+                    sn=sn,
+                    used_for=used_for,
+                    month=created_at.year * 100 + created_at.month,
+                )
+                for _, sn, used_for, created_at in rows
+            ]
+            SerialNumberArchive.objects.bulk_create(archived, batch_size=batch_size, ignore_conflicts=True)
+            SerialNumber.objects.filter(id__in=[pk for pk, *_ in rows]).delete()
+        return archived
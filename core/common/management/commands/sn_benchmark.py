@@ -0,0 +1,80 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : sn_benchmark.py
+# Time       : 2025-09-20 10:12:31
+# Author     : lyx
+# version    : python 3.11
+# Description: 流水号生成性能测试
+"""
+import statistics
+import time
+
+from django.db import connection, transaction
+from django.core.management.base import BaseCommand
+from django.test.utils import CaptureQueriesContext
+
+from core.common.generator import SerialNumberGenerator
+
+
+class Command(BaseCommand):
+    help = "测试流水号生成耗时，测试数据在事务中生成后回滚，不会写入数据库"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--count",
+            default=5000,
+            type=int,
+            help="每次生成的流水号数量, 默认5000",
+        )
+        parser.add_argument(
+            "--repeat",
+            default=5,
+            type=int,
+            help="重复次数, 默认5",
+        )
+        parser.add_argument(
+            "--mode",
+            default=SerialNumberGenerator.MODE_RANDOM,
+            type=str,
+            help="流水号生成模式, 默认random",
+            choices=[SerialNumberGenerator.MODE_RANDOM, SerialNumberGenerator.MODE_SEGMENT],
+        )
+        parser.add_argument(
+            "--prefix",
+            default="GZ",
+            type=str,
+            help="流水号前缀, 默认GZ",
+        )
+        parser.add_argument(
+            "--letter-length",
+            default=0,
+            type=int,
+            help="字母位数, 默认0",
+        )
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        costs = []
+        queries = 0
+        for _ in range(options["repeat"]):
+            generator = SerialNumberGenerator()  # 每次使用新实例，号段模式不复用内存中的号段
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as ctx:
+                    start = time.perf_counter()
+                    generator.next_ids(
+                        count,
+                        prefix=options["prefix"],
+                        used_for="sn_benchmark",
+                        letter_length=options["letter_length"],
+                        mode=options["mode"],
+                    )
+                    costs.append((time.perf_counter() - start) * 1000)
+                queries = len(ctx.captured_queries)
+                transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"mode={options['mode']} count={count} repeat={options['repeat']} "
+            f"queries={queries} "
+            f"min={min(costs):.1f}ms median={statistics.median(costs):.1f}ms max={max(costs):.1f}ms"
+        )
@@ -7,6 +7,7 @@ class SerialNumber(models.Model):
 
     sn = models.CharField("流水号", max_length=64, unique=True, db_index=True)
     used_for = models.CharField("使用表/用途", max_length=64, null=True, blank=True, db_index=True)
+    batch_no = models.CharField("写入批次", max_length=32, null=True, blank=True)
     created_at = models.DateTimeField("创建时间", auto_now_add=True)
 
     class Meta:
@@ -18,6 +19,58 @@ class SerialNumber(models.Model):
         return f"{self.used_for}:{self.sn}"
 
 
+class SerialNumberArchive(models.Model):
+    """已归档的流水号，按用途、月份分组存储，仍参与唯一性校验"""
+
+    sn = models.CharField("流水号", max_length=64, unique=True)
+    used_for = models.CharField("使用表/用途", max_length=64, null=True, blank=True)
+    month = models.IntegerField("生成月份", help_text="格式: yyyymm")
+    archived_at = models.DateTimeField("归档时间", auto_now_add=True)
+
+    class Meta:
+        db_table = "serial_number_archive"
+        verbose_name = "流水号归档"
+        verbose_name_plural = "流水号归档"
+        indexes = [
+            models.Index(fields=["used_for", "month"], name="sn_archive_used_for_month_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.used_for}:{self.sn}"
+
+
+class SerialNumberSegment(models.Model):
+    """号段表：进程一次租用一段连续号码，然后在内存中发放"""
+
+    biz_key = models.CharField("号段标识", max_length=64, unique=True)
+    max_value = models.BigIntegerField("已分配最大值", default=0)
+    update_time = models.DateTimeField("更新时间", auto_now=True)
+
+    class Meta:
+        db_table = "serial_number_segment"
+        verbose_name = "流水号号段"
+        verbose_name_plural = "流水号号段"
+
+    def __str__(self):
+        return f"{self.biz_key}:{self.max_value}"
+
+
+class SerialNumberWorker(models.Model):
+    """雪花模式机器号租约，每个进程租用一个机器号，到期未续约的机器号可被其他进程租用"""
+
+    worker_id = models.IntegerField("机器号", unique=True)
+    owner = models.CharField("持有者", max_length=128, null=True, blank=True)
+    expire_time = models.DateTimeField("租约到期时间")
+
+    class Meta:
+        db_table = "serial_number_worker"
+        verbose_name = "流水号机器号"
+        verbose_name_plural = "流水号机器号"
+
+    def __str__(self):
+        return f"{self.worker_id}:{self.owner}"
+
+
 class SignalReceiverFail(models.Model):
     # 信号来源
     signal = models.CharField(max_length=255, help_text="信号名称，例如 after_created_expense_salary_signal")
@@ -0,0 +1,175 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : sn_pool.py
+# Time       : 2025-09-20 15:40:12
+# Author     : lyx
+# version    : python 3.11
+# Description: 异步流水号池，预先租用一批流水号，协程直接从内存中取号
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+
+from asgiref.sync import sync_to_async
+
+from core.conf import settings
+from .generator import SerialNumberGenerator, sn_generator
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSerialNumberPool:
+    """
+    按 used_for 维护的异步流水号池
+    池内号码低于低水位时在后台补充，命中时不需要切换线程也不需要访问数据库。
+    池内号码在生成时已经保证唯一，进程退出时未使用的号码会成为空号。
+
+    使用示例：
+    pool = get_sn_pool(prefix="GZ", used_for="staff.StaffSalary", letter_length=0)
+    sns = await pool.next_ids(10)
+    """
+
+    def __init__(
+        self,
+        prefix: str = "SN",
+        used_for: str = None,
+        length: int = 16,
+        letter_length: int = 4,
+        size: int = None,
+        low_watermark: int = None,
+        generator: SerialNumberGenerator = sn_generator,
+    ):
+        self.prefix = prefix
+        self.used_for = used_for
+        self.length = length
+        self.letter_length = letter_length
+        self.size = size or settings.SERIAL_NUMBER_POOL_SIZE
+        self.low_watermark = low_watermark or settings.SERIAL_NUMBER_POOL_LOW_WATERMARK
+        self.generator = generator
+
+        self._buffer: deque[str] = deque()
+        self._refill_task: asyncio.Task = None
+        # 同步补号和后台补号都会向池内追加号码，统一在锁内计算缺口并追加，池内号码不会超过 size
+        self._lock = asyncio.Lock()
+
+        # 监控指标
+        self.hits = 0  # 池内号码足够，直接取号的次数
+        self.misses = 0  # 池内号码不足，需要同步补号的次数
+        self.refill_count = 0  # 补号次数
+        self.refill_total_ms = 0.0  # 补号总耗时
+        self.refill_max_ms = 0.0  # 补号最大耗时
+
+    async def next_id(self) -> str:
+        """获取单个流水号"""
+        return (await self.next_ids(1))[0]
+
+    async def next_ids(self, count: int) -> list[str]:
+        """获取多个流水号"""
+        if count <= 0:
+            raise ValueError("count 必须大于 0")
+
+        if len(self._buffer) >= count:
+            self.hits += 1
+            result = [self._buffer.popleft() for _ in range(count)]
+        else:
+            async with self._lock:
+                # 等待进行中的补号完成后重新检查，补号后池内号码可能已经足够
+                if len(self._buffer) >= count:
+                    self.hits += 1
+                    result = [self._buffer.popleft() for _ in range(count)]
+                else:
+                    # 池内号码不够，先取完池内号码，不足部分连同新的池内号码一次生成
+                    self.misses += 1
+                    result = list(self._buffer)
+                    self._buffer.clear()
+                    missing = count - len(result)
+                    ids = await self._generate(missing + self.size)
+                    result.extend(ids[:missing])
+                    self._buffer.extend(ids[missing:])
+
+        self._schedule_refill()
+        return result
+
+    def stats(self) -> dict:
+        """获取监控指标"""
+        return {
+            "prefix": self.prefix,
+            "used_for": self.used_for,
+            "size": self.size,
+            "available": len(self._buffer),
+            "hits": self.hits,
+            "misses": self.misses,
+            "refill_count": self.refill_count,
+            "refill_total_ms": round(self.refill_total_ms, 3),
+            "refill_avg_ms": round(self.refill_total_ms / self.refill_count, 3) if self.refill_count else 0,
+            "refill_max_ms": round(self.refill_max_ms, 3),
+        }
+
+    def _schedule_refill(self):
+        """低于低水位时在后台补号"""
+        if len(self._buffer) >= self.low_watermark:
+            return
+        if self._refill_task is not None and not self._refill_task.done():
+            return
+        self._refill_task = asyncio.get_running_loop().create_task(self._refill())
+
+    async def _refill(self):
+        try:
+            async with self._lock:
+                missing = self.size - len(self._buffer)
+                if missing > 0:
+                    self._buffer.extend(await self._generate(missing))
+        except Exception:
+            logger.error(f"流水号池补号失败 - used_for:[{self.used_for}]", exc_info=True)
+
+    async def _generate(self, count: int) -> list[str]:
+        start = time.perf_counter()
+        ids = await sync_to_async(self.generator.next_ids)(
+            count,
+            prefix=self.prefix,
+            used_for=self.used_for,
+            length=self.length,
+            letter_length=self.letter_length,
+        )
+        cost = (time.perf_counter() - start) * 1000
+        self.refill_count += 1
+        self.refill_total_ms += cost
+        self.refill_max_ms = max(self.refill_max_ms, cost)
+        return ids
+
+
+# ----------------- 按 used_for 缓存 -----------------
+_sn_pools: dict[str, AsyncSerialNumberPool] = {}
+_sn_pools_lock = threading.Lock()
+
+def get_sn_pool(
+    prefix: str = "SN",
+    used_for: str = None,
+    length: int = 16,
+    letter_length: int = 4,
+) -> AsyncSerialNumberPool:
+    key = f"{used_for}:{prefix}:{length}:{letter_length}"
+    pool = _sn_pools.get(key)
+    if pool is None:
+        with _sn_pools_lock:
+            pool = _sn_pools.get(key)
+            if pool is None:
+                pool = _sn_pools[key] = AsyncSerialNumberPool(
+                    prefix=prefix,
+                    used_for=used_for,
+                    length=length,
+                    letter_length=letter_length,
+                )
+    return pool
+
+def get_sn_pool_stats() -> list[dict]:
+    """获取所有流水号池的监控指标"""
+    return [pool.stats() for pool in list(_sn_pools.values())]
+
+
+def sum_sn_pool_stats(name: str) -> float:
+    """所有流水号池某项监控指标之和，注册为接口指标计数器"""
+    return sum(stats[name] for stats in get_sn_pool_stats())
@@ -5,6 +5,12 @@ NINJA_BASE_URL = "api/"  # ninja跟路径
 TOKEN_TAG = "X-Authorization"   # token标记名称
 TOKEN_ORIGIN = "cookie"         # token来源
 TOKEN_EXPIRE = 60 * 60 * 24 * 7 # token过期时间
+TOKEN_CACHE_SIZE = 10000        # 已校验token缓存数量，0 为不缓存
+USER_CACHE_SIZE = 10000         # token 用户缓存数量，0 为不缓存
+USER_CACHE_TTL = 60             # token 用户缓存时间（秒），多进程部署时其它进程的用户修改最多延迟这么久生效
+# 请求处理流水线路由表 [(路径前缀, (处理阶段, ...)), ...]，取最长匹配的前缀，为 None 时使用 default_routes()（接口校验 token）
+# 处理阶段：status_code、docs_login、jwt、admin_login_jwt，见 core/middlewares/pipeline_middleware.py
+PIPELINE_ROUTES = None
 
 DEFAULT_AVATAR = "system/user_default.png"
 DEFAULT_IMAGE = "system/image_default.png"
@@ -61,6 +67,17 @@ _NINJAT_EXCEPTION_HANDLERS = {
     "Exception": "core.ninja_extra.exception_handlers:finally_exception_handler",
 }  # 内部异常处理
 NINJAT_EXCEPTION_HANDLERS = {}  # 自定义异常处理
+NINJA_TRUSTED_RESPONSE = False  # 信任接口返回值结构，成功响应直接 orjson 序列化，不再经过响应模型校验（返回值需与 response_schema 一致）
+
+PAGINATION_COUNT_STRATEGY = "exact"  # 分页总数统计策略：exact（精确）/ cached（缓存）/ estimate（执行计划估算）/ has_next（不统计总数）
+PAGINATION_COUNT_CACHE_TTL = 60  # cached 策略总数缓存时长（秒）
+PAGINATION_COUNT_ESTIMATE_THRESHOLD = 1000  # estimate 策略估算值小于该值时精确统计
+PAGINATION_COUNT_WORKERS = 4  # 分页总数统计线程数，cached/estimate 策略在这些线程的独立连接中统计（读不到请求事务中未提交的数据）
+STREAM_CHUNK_SIZE = 2000  # 流式输出每批读取条数
+METRICS_ENABLED = True  # 是否记录接口指标，导出地址为 NINJA_BASE_URL + metrics
+METRICS_DIR = None  # 多进程指标目录，每个进程写入 <pid>.json，导出时合并；为空时只导出当前进程的指标
+METRICS_FLUSH_INTERVAL = 5  # 进程指标写入文件的最小间隔（秒）
+METRICS_ALLOWED_IPS = ["127.0.0.1", "::1"]  # 允许访问指标导出地址的 ip 或网段，如 10.0.0.0/8
 # endregion ****************** Ninja end ********************* #
 
 # region ******************** 权限 start ******************** #
@@ -73,4 +90,13 @@ _PERM_PAKC = {
         }
     }
 }
-# endregion ****************** 权限 end ********************* #
\ No newline at end of file
+SIMPLEUI_MENU_CACHE_SIZE = 1000  # simpleui 菜单树缓存用户数量，0 为不缓存
+SIMPLEUI_MENU_CACHE_TTL = 300    # simpleui 菜单缓存时间（秒），多进程部署时其它进程的菜单、权限修改最多延迟这么久生效
+# endregion ****************** 权限 end ********************* #
+# region ******************** 流水号 start ******************** #
+SERIAL_NUMBER_MODES = {}  # 按 used_for 选择流水号生成模式：random（默认，落表校验）/ segment（号段模式）/ snowflake（雪花模式，数字部分至少20位）
+SERIAL_NUMBER_SEGMENT_STEP = 1000  # 号段模式每次租用的号码数量
+SERIAL_NUMBER_WORKER_LEASE_SECONDS = 60 * 60  # 雪花模式机器号租约时长
+SERIAL_NUMBER_POOL_SIZE = 500  # 异步流水号池容量
+SERIAL_NUMBER_POOL_LOW_WATERMARK = 100  # 异步流水号池低水位，低于该值时后台补号
+# endregion ****************** 流水号 end ********************* #
@@ -0,0 +1,58 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : base_middleware.py
+# Time       : 2025-10-19 00:12:31
+# Author     : lyx
+# version    : python 3.11
+# Description: 同步/异步兼容中间件基类
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpRequest
+from django.http.response import HttpResponseBase
+
+
+class BaseMiddleware:
+    """
+    同步/异步兼容中间件基类
+    ASGI 部署下层为异步时走 __acall__，请求在事件循环中处理，不再为每个请求切换线程
+    子类实现 process_request / process_response，这两个方法在异步链路中直接调用，不能访问数据库；
+    需要访问数据库时覆盖 aprocess_request / aprocess_response
+    与 django 的 MiddlewareMixin 不同，异步链路中不会用 sync_to_async 包装 process_request / process_response
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if self.async_mode:
+            return self.__acall__(request)
+        response = self.process_request(request)
+        if response is None:
+            response = self.get_response(request)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request: HttpRequest):
+        response = await self.aprocess_request(request)
+        if response is None:
+            response = await self.get_response(request)
+        return await self.aprocess_response(request, response)
+
+    def process_request(self, request: HttpRequest) -> HttpResponseBase | None:
+        """返回响应时不再调用下层"""
+        return None
+
+    def process_response(self, request: HttpRequest, response: HttpResponseBase) -> HttpResponseBase:
+        return response
+
+    async def aprocess_request(self, request: HttpRequest) -> HttpResponseBase | None:
+        return self.process_request(request)
+
+    async def aprocess_response(self, request: HttpRequest, response: HttpResponseBase) -> HttpResponseBase:
+        return self.process_response(request, response)
@@ -0,0 +1,93 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : django_middlewares.py
+# Time       : 2025-10-19 01:05:47
+# Author     : lyx
+# version    : python 3.11
+# Description: django 内置中间件的异步版本
+                django 的 MiddlewareMixin 在异步链路中用 sync_to_async 调用 process_request/process_response，
+                每个中间件每个请求切换两次线程；这里的处理不访问数据库时直接在事件循环中调用，同步链路行为不变
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings as django_settings
+from django.contrib.auth import middleware as auth_middleware
+from django.contrib.messages import middleware as messages_middleware
+from django.contrib.sessions import middleware as sessions_middleware
+from django.http import HttpRequest
+from django.middleware import clickjacking, common, csrf, security
+
+
+class InlineMiddlewareMixin:
+    """异步链路中直接调用 process_request/process_response，子类按需判断是否要切换到线程中执行"""
+
+    def inline_request(self, request: HttpRequest) -> bool:
+        return True
+
+    def inline_response(self, request: HttpRequest, response) -> bool:
+        return True
+
+    async def __acall__(self, request: HttpRequest):
+        response = None
+        if hasattr(self, "process_request"):
+            if self.inline_request(request):
+                response = self.process_request(request)
+            else:
+                response = await sync_to_async(self.process_request, thread_sensitive=True)(request)
+        response = response or await self.get_response(request)
+        if hasattr(self, "process_response"):
+            if self.inline_response(request, response):
+                response = self.process_response(request, response)
+            else:
+                response = await sync_to_async(self.process_response, thread_sensitive=True)(request, response)
+        return response
+
+
+class SecurityMiddleware(InlineMiddlewareMixin, security.SecurityMiddleware):
+    pass
+
+
+class SessionMiddleware(InlineMiddlewareMixin, sessions_middleware.SessionMiddleware):
+
+    def inline_response(self, request: HttpRequest, response) -> bool:
+        """session 修改后要保存到数据库"""
+        session = getattr(request, "session", None)
+        return session is None or not (session.modified or django_settings.SESSION_SAVE_EVERY_REQUEST)
+
+
+class CommonMiddleware(InlineMiddlewareMixin, common.CommonMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(InlineMiddlewareMixin, csrf.CsrfViewMiddleware):
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if self.async_mode and not django_settings.CSRF_USE_SESSIONS:
+            # 加载中间件时异步的 process_view 不再用 sync_to_async 包装；token 存在 session 中时要读数据库，仍在线程中执行
+            self.process_view = self.aprocess_view
+
+    async def aprocess_view(self, request: HttpRequest, callback, callback_args, callback_kwargs):
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+    def inline_request(self, request: HttpRequest) -> bool:
+        return not django_settings.CSRF_USE_SESSIONS
+
+    def inline_response(self, request: HttpRequest, response) -> bool:
+        return not django_settings.CSRF_USE_SESSIONS
+
+
+class AuthenticationMiddleware(InlineMiddlewareMixin, auth_middleware.AuthenticationMiddleware):
+    """request.user 延迟加载，process_request 不访问数据库"""
+
+
+class MessageMiddleware(InlineMiddlewareMixin, messages_middleware.MessageMiddleware):
+
+    def inline_response(self, request: HttpRequest, response) -> bool:
+        """读取或添加过消息时，保存消息可能要读写 session"""
+        storage = getattr(request, "_messages", None)
+        return storage is None or not (storage.used or storage.added_new)
+
+
+class XFrameOptionsMiddleware(InlineMiddlewareMixin, clickjacking.XFrameOptionsMiddleware):
+    pass
@@ -0,0 +1,276 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : pipeline_middleware.py
+# Time       : 2025-10-19 01:48:26
+# Author     : lyx
+# version    : python 3.11
+# Description: 请求处理流水线中间件，合并状态码转换、文档登录、admin 登录转 jwt、jwt 校验
+                按路径前缀路由表选择处理阶段，只执行该前缀需要的阶段
+"""
+import logging
+from typing import Dict, List, Sequence, Tuple
+
+from asgiref.sync import sync_to_async
+from django.http import HttpRequest, HttpResponse
+from django.http.response import HttpResponseBase
+from jwt import ExpiredSignatureError
+
+from core.conf import settings
+from core.middlewares.base_middleware import BaseMiddleware
+from core.ninja_extra.renderers import ORJSONRenderer
+from core.ninja_extra.response_schema import ErrorResponse, ResponseLevel
+from core.utils import http_util, orjson_util, token_util, user_util
+
+logger = logging.getLogger(__name__)
+
+TOKEN_ORIGIN = settings.TOKEN_ORIGIN  # token来源
+TOKEN_TAG = settings.TOKEN_TAG  # token标记名称
+SECRET_KEY = settings.SECRET_KEY
+TOKEN_EXPIRE = settings.TOKEN_EXPIRE  # token过期时间
+token_handler = token_util.tk_handler_dict[TOKEN_ORIGIN]
+
+
+# ================= 预序列化的错误响应 =================
+def _error_body(code: str, msg: str) -> bytes:
+    return orjson_util.dumps_django(ErrorResponse(code=code, msg=msg, level=ResponseLevel.ERROR).model_dump())
+
+
+NOT_LOGIN_BODY = _error_body("401", "未登录")
+INVALID_TOKEN_BODY = _error_body("404", "未登录")
+_status_bodies: Dict[Tuple[int, str], bytes] = {}  # (状态码, 原因) -> 响应内容
+
+
+def error_response(body: bytes) -> HttpResponse:
+    """响应对象每次新建（会被修改），内容复用预先序列化的 bytes"""
+    return HttpResponse(body, content_type=ORJSONRenderer.media_type)
+
+
+def status_body(status_code: int, reason: str) -> bytes:
+    key = (status_code, reason)
+    body = _status_bodies.get(key)
+    if body is None:
+        body = _status_bodies[key] = orjson_util.dumps_django(ErrorResponse(code=str(status_code), msg=reason).model_dump())
+    return body
+
+
+# ================= 处理阶段 =================
+class Stage:
+    """
+    流水线处理阶段，方法约定与 BaseMiddleware 相同
+    process_request 返回响应时不再执行后续阶段和视图，已执行阶段的 process_response 仍会逆序执行
+    """
+
+    def process_request(self, request: HttpRequest) -> HttpResponseBase | None:
+        return None
+
+    async def aprocess_request(self, request: HttpRequest) -> HttpResponseBase | None:
+        return self.process_request(request)
+
+    def process_response(self, request: HttpRequest, response: HttpResponseBase) -> HttpResponseBase:
+        return response
+
+
+class StatusCodeStage(Stage):
+    """非 200 的普通响应转换为错误响应"""
+
+    def process_response(self, request: HttpRequest, response):
+        if isinstance(response, HttpResponse) and response.status_code != 200:
+            return error_response(status_body(response.status_code, response.reason_phrase))
+        return response
+
+
+class DocsLoginStage(Stage):
+    """文档登录，没有 token 时通过 HTTP Basic 认证生成 token，由 jwt 阶段校验"""
+
+    def process_request(self, request: HttpRequest):
+        token = token_handler.get(request, TOKEN_TAG)  # 去指定来源获取token
+        if not token:
+            return self.login(request, http_util.check_basic_auth(request))  # 通过HTTP Basic的方式认证
+        return self.verify(token)
+
+    async def aprocess_request(self, request: HttpRequest):
+        token = token_handler.get(request, TOKEN_TAG)
+        if not token:
+            user = await sync_to_async(http_util.check_basic_auth)(request)  # 认证要查询用户、校验密码
+            return self.login(request, user)
+        return self.verify(token)
+
+    def process_response(self, request: HttpRequest, response):
+        new_token = getattr(request, "new_token", None)
+        if new_token:
+            token_handler.set(response, TOKEN_TAG, new_token)  # 注入token
+        return response
+
+    def login(self, request: HttpRequest, user):
+        if not user:  # 认证失败
+            return self.return_login_response()
+        request.new_token = token_util.create_token(
+            payload={
+                "uid": user.pk,
+            },
+            secret=SECRET_KEY,
+            expire_seconds=TOKEN_EXPIRE
+        ) # 生成token
+        return None
+
+    def verify(self, token: str):
+        """token 无效时要求重新登录，校验结果由 jwt 阶段复用（已缓存）"""
+        try:
+            token_util.verify_token_cached(token, SECRET_KEY)
+        except ExpiredSignatureError:
+            logger.warning(f'token已过期 - {token}')
+            return self.return_login_response()
+        except Exception:
+            logger.warning(f'token验证失败 - {token}')
+            return self.return_login_response()
+        return None
+
+    def return_login_response(self):
+        response = HttpResponse("Unauthorized", status=401)
+        # 创建一个401未授权响应
+        response['WWW-Authenticate'] = 'Basic realm="DjangoRealm"'
+        # 设置WWW-Authenticate头，提示浏览器弹出认证对话框
+        token_handler.remove(response, TOKEN_TAG)
+        return response
+
+
+class JWTStage(Stage):
+    """jwt 校验，成功时按 token 设置当前用户"""
+
+    def process_request(self, request: HttpRequest):
+        response = self.verify(request)
+        if response is None:
+            user_util.attach_user(request, request.jwt_payload.get("uid"))
+        return response
+
+    async def aprocess_request(self, request: HttpRequest):
+        response = self.verify(request)
+        if response is None:
+            await user_util.aattach_user(request, request.jwt_payload.get("uid"))  # 异步视图中直接访问 request.user 不会查询数据库
+        return response
+
+    def verify(self, request: HttpRequest):
+        token = token_handler.get(request, TOKEN_TAG)  # 去指定来源获取token
+        if not token:
+            token = getattr(request, "new_token", None)  # token 可能是文档登录阶段生成的
+        if not token:
+            return error_response(NOT_LOGIN_BODY)
+
+        try:
+            request.jwt_payload = token_util.verify_token_cached(token, SECRET_KEY)
+        except ExpiredSignatureError:
+            logger.warning(f'token已过期 - {token}')
+            return error_response(NOT_LOGIN_BODY)
+        except Exception:
+            logger.error(f'token验证失败 - {token}', exc_info=True)
+            return error_response(INVALID_TOKEN_BODY)
+        return None
+
+
+class AdminLoginJWTStage(Stage):
+    """admin 登录成功后写入 token，登录标志由 user_logged_in 信号设置"""
+
+    def process_response(self, request: HttpRequest, response):
+        if not getattr(request, 'admin_login_success', False):  # 先判断登录标志，其它请求不读取 request.user（会查询 session 和用户）
+            return response
+        user = request.user  # 登录成功后 request.user 已是用户对象
+        if user.is_authenticated and user.is_staff:  # 登录用户且是后台工作人员
+            token = token_util.create_token(
+                payload={
+                    "uid": user.pk,
+                },
+                secret=SECRET_KEY,
+                expire_seconds=TOKEN_EXPIRE
+            ) # 生成token
+            token_handler.set(response, TOKEN_TAG, token)  # 注入token
+        return response
+
+
+# 阶段名 -> 阶段，PIPELINE_ROUTES 中按名称引用
+STAGES: Dict[str, Stage] = {
+    "status_code": StatusCodeStage(),
+    "docs_login": DocsLoginStage(),
+    "jwt": JWTStage(),
+    "admin_login_jwt": AdminLoginJWTStage(),
+}
+
+
+def default_routes() -> List[Tuple[str, Sequence[str]]]:
+    """
+    接口、文档按 "/" + NINJA_BASE_URL 匹配（合并前的中间件用 "api/"、"/docs" 匹配以 "/" 开头的 request.path，
+    token 校验、状态码转换、文档登录实际都没有生效）
+    """
+    api_url = f"/{settings.NINJA_BASE_URL}"
+    return [
+        (f"{api_url}metrics", ()),  # Prometheus 拉取，不校验 token，由 METRICS_ALLOWED_IPS 限制访问
+        (f"{api_url}docs", ("docs_login", "jwt")),  # 文档的 401 要弹出登录框，不转换状态码
+        (api_url, ("status_code", "jwt")),
+        ("/admin/", ("admin_login_jwt",)),
+    ]
+
+
+def compile_routes(routes: Sequence[Tuple[str, Sequence[str]]]) -> Tuple[Tuple[str, Tuple[Stage, ...]], ...]:
+    """阶段名解析为阶段对象，按前缀长度倒序排列，匹配时取最长前缀"""
+    compiled = []
+    for prefix, stage_names in routes:
+        unknown = [name for name in stage_names if name not in STAGES]
+        assert not unknown, f"流水线路由 {prefix} 的处理阶段不存在: {unknown}"
+        compiled.append((prefix, tuple(STAGES[name] for name in stage_names)))
+    compiled.sort(key=lambda route: len(route[0]), reverse=True)
+    return tuple(compiled)
+
+
+class PipelineMiddleware(BaseMiddleware):
+    """
+    请求处理流水线，路由表由 PIPELINE_ROUTES 配置（为 None 时使用 default_routes()）
+    请求阶段按配置顺序执行，响应阶段逆序执行，与多个中间件的嵌套顺序一致
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.routes = compile_routes(settings.PIPELINE_ROUTES or default_routes())
+
+    def match(self, path: str) -> Tuple[Stage, ...]:
+        for prefix, stages in self.routes:
+            if path.startswith(prefix):
+                return stages
+        return ()
+
+    def __call__(self, request: HttpRequest):
+        if self.async_mode:
+            return self.__acall__(request)
+        stages = self.match(request.path)
+        if not stages:
+            return self.get_response(request)
+
+        response = None
+        executed = 0
+        for stage in stages:
+            executed += 1
+            response = stage.process_request(request)
+            if response is not None:
+                break
+        if response is None:
+            response = self.get_response(request)
+        for stage in reversed(stages[:executed]):
+            response = stage.process_response(request, response)
+        return response
+
+    async def __acall__(self, request: HttpRequest):
+        stages = self.match(request.path)
+        if not stages:
+            return await self.get_response(request)
+
+        response = None
+        executed = 0
+        for stage in stages:
+            executed += 1
+            response = await stage.aprocess_request(request)
+            if response is not None:
+                break
+        if response is None:
+            response = await self.get_response(request)
+        for stage in reversed(stages[:executed]):
+            response = stage.process_response(request, response)
+        return response
@@ -12,8 +12,11 @@ from functools import wraps
 import logging
 from typing import Dict, List, Tuple, cast
 from ninja import NinjaAPI, Router, Body, Query, Path, Schema, Header
+from django.http import StreamingHttpResponse
+from django.http.response import HttpResponseBase
 from django.http.request import HttpRequest
 from core.exceptions.base_exceptions import (
+    BaseException as CoreBaseException,
     SysException,
     BusinessException,
     NotRegisteredCodeException,
@@ -37,11 +40,17 @@ from ninja.utils import (
     contribute_operation_callback,
     is_async_callable,
 )
-from core.ninja_extra.base_pagination import AsyncLimitOffsetPagination, paginate
+from core.ninja_extra.base_pagination import AsyncLimitOffsetPagination, AsyncKeysetPagination, FastPageOutput, paginate
+from core.ninja_extra.streaming import StreamInput, StreamOutput, streamable
+from core.ninja_extra.renderers import ORJSONRenderer, json_response
+from core.ninja_extra import metrics
 
 
 logger = logging.getLogger(__name__)
 
+# 成功响应的默认字段，快速输出时直接填充 data
+_SUCCESS_ENVELOPE = SuccessResponse().model_dump()
+
 
 class BaseApi:
 
@@ -64,10 +73,16 @@ class BaseApi:
     methods: list[str] = ["POST"]  # 接口方法类型
     api_status: str = ApiStatus.DEV_IN_PROGRESS  # 接口状态
     wrap_response: bool = True  # 是否包装响应
+    trusted_response: bool = None  # 信任返回值结构，直接序列化响应，不再经过响应模型校验，为空时使用 NINJA_TRUSTED_RESPONSE
 
     # 分页
     is_pagination: bool = False
-    pagination_class: AsyncLimitOffsetPagination = AsyncLimitOffsetPagination
+    pagination_class: type[AsyncLimitOffsetPagination] | type[AsyncKeysetPagination] = AsyncLimitOffsetPagination
+    count_strategy: str = None  # 分页总数统计策略（exact/cached/estimate/has_next），为空时使用分页器配置，仅 AsyncLimitOffsetPagination 使用
+
+    # 流式输出，开启后接口支持 format=ndjson/csv 参数，api 需返回 queryset
+    is_stream: bool = False
+    stream_chunk_size: int = None  # 每批读取条数，为空时使用 STREAM_CHUNK_SIZE
 
     # 异常码
     finally_code: tuple | str = None
@@ -81,17 +96,28 @@ class BaseApi:
     def _api_response_wrapper(cls):
         """处理api返回值"""
 
+        trusted = settings.NINJA_TRUSTED_RESPONSE if cls.trusted_response is None else cls.trusted_response
+
         def decorator(func):
 
             @wraps(func)
             async def wrapper(*args, **kwargs):
                 response = await func(*args, **kwargs)
-                if cls.wrap_response:
-                    if isinstance(response, ResponseBaseSchema):
-                        return response
-                    return SuccessResponse(data=response)
-                else:
+                if isinstance(response, StreamOutput):
+                    return cls._stream_response(response)
+                if isinstance(response, HttpResponseBase):
                     return response
+                if isinstance(response, FastPageOutput):
+                    # 分页快速输出，直接序列化，不再经过响应模型校验
+                    return json_response({**_SUCCESS_ENVELOPE, "data": response} if cls.wrap_response else response)
+                if cls.wrap_response and not isinstance(response, ResponseBaseSchema):
+                    if trusted:
+                        return json_response({**_SUCCESS_ENVELOPE, "data": response})
+                    # 由 ninja 按响应模型校验，这里只构造不重复校验
+                    response = SuccessResponse.model_construct(data=response)
+                if trusted:
+                    return json_response(response)
+                return response
 
             return wrapper
 
@@ -108,37 +134,78 @@ class BaseApi:
                 try:
                     return await func(*args, **kwargs)
                 except BusinessException as e:
-                    error_code = e.error_code
-                    error_data = e.data
-                    if error_code in code_dict:
-                        message = code_dict[error_code]
-                    else:
-                        error_code = f"{cls._api_code}{error_code}"
-                        if error_code not in cls._merge_error_codes.keys():
-                            raise NotRegisteredCodeException(error_code)
-                        message = cls._merge_error_codes[error_code]
-                    raise SysException(
-                        code=error_code, message=message, data=error_data
-                    )
+                    raise cls._to_sys_exception(e)
 
             return wrapper
 
         return decorator
 
+    @classmethod
+    def _to_sys_exception(cls, e: BusinessException) -> SysException:
+        """业务异常转换为带接口异常码的系统异常"""
+        error_code = e.error_code
+        error_data = e.data
+        if error_code in code_dict:
+            message = code_dict[error_code]
+        else:
+            error_code = f"{cls._api_code}{error_code}"
+            if error_code not in cls._merge_error_codes.keys():
+                raise NotRegisteredCodeException(error_code)
+            message = cls._merge_error_codes[error_code]
+        return SysException(
+            code=error_code, message=message, data=error_data
+        )
+
+    @classmethod
+    def _stream_error(cls, e: Exception) -> ErrorResponse:
+        """流式输出过程中的异常，转换为与异常处理一致的错误响应"""
+        if isinstance(e, BusinessException):
+            try:
+                e = cls._to_sys_exception(e)
+            except Exception as convert_error:
+                e = convert_error
+        if not isinstance(e, CoreBaseException):
+            return ErrorResponse(code="1", msg=code_dict.get("1", "未知异常"))
+        message = e.message
+        if isinstance(message, BaseLevel):
+            return ErrorResponse(code=str(e.code), msg=message.msg, level=message.level)
+        return ErrorResponse(code=str(e.code), msg=str(message))
+
+    @classmethod
+    def _stream_response(cls, output: StreamOutput) -> StreamingHttpResponse:
+        response = StreamingHttpResponse(output.aiter_content(cls._stream_error), content_type=output.content_type)
+        if output.content_type.startswith("text/csv"):
+            response["Content-Disposition"] = f'attachment; filename="{cls._api_code}.csv"'
+        return response
+
+    @classmethod
+    def _api_metrics_wrapper(cls):
+        """记录接口耗时、数据库耗时、查询次数、响应大小，接口码在注册时才确定，调用时再取"""
+        return metrics.instrument(lambda: cls._api_code)
+
     def __init_subclass__(cls) -> None:
         api_wrapper_func = cls.api
         if cls.is_pagination:
             pagination_class = cls.pagination_class
             assert pagination_class is not None, "分页器不能为空"
-            api_wrapper_func = paginate(pagination_class)(api_wrapper_func)
+            api_wrapper_func = paginate(pagination_class, cls.count_strategy, cls.response_schema)(api_wrapper_func)
             # contribute_operation_args(
             #     api_wrapper_func,
             #     "ninja_pagination",
             #     pagination_class.Input,
             #     pagination_class.InputSource,
             # )
+        if cls.is_stream:
+            api_wrapper_func = streamable(
+                cls.api,
+                cls.pagination_class if cls.is_pagination else None,
+                cls.response_schema,
+                cls.stream_chunk_size,
+            )(api_wrapper_func)
         api_wrapper_func = cls._api_response_wrapper()(api_wrapper_func)
         api_wrapper_func = cls._api_exception_wrapper()(api_wrapper_func)
+        if settings.METRICS_ENABLED:
+            api_wrapper_func = cls._api_metrics_wrapper()(api_wrapper_func)
         setattr(cls, "api", api_wrapper_func)
 
 
@@ -157,6 +224,7 @@ class NinjaAPIExtra:
             title=title,
             version=version,
             description=description,
+            renderer=ORJSONRenderer(),
         )
         self.exception_handler = exception_handler
         self.code_dict = code_dict
@@ -316,6 +384,13 @@ class NinjaAPIExtra:
                             SuccessResponse[api_class.response_schema]
                             | ErrorResponse[api_class.error_response_schema]
                         )
+                    if api_class.is_stream:
+                        contribute_operation_args(
+                            view_func,
+                            "ninja_stream",
+                            StreamInput,
+                            Query(...),
+                        )
 
                     # 注册api到路由中
                     router_obj.add_api_operation(
@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class CoreNinjaExtraConfig(AppConfig):
@@ -6,3 +7,22 @@ class CoreNinjaExtraConfig(AppConfig):
     name = 'core.ninja_extra' 
     label = 'core_ninja_extra'
     verbose_name = "Ninja扩展"
+
+    def ready(self):
+        from core.common import sn_pool
+        from core.conf import settings
+        from core.ninja_extra import metrics
+        from core.utils import token_util, user_util
+
+        if settings.METRICS_ENABLED:
+            connection_created.connect(metrics.install_query_wrapper, dispatch_uid="ninja_api_metrics")
+            metrics.register_counter("jwt_token_cache_hits_total", "token 校验缓存命中次数", lambda: token_util.token_cache.hits)
+            metrics.register_counter("jwt_token_cache_misses_total", "token 校验缓存未命中次数", lambda: token_util.token_cache.misses)
+            metrics.register_counter("jwt_user_cache_hits_total", "token 用户缓存命中次数", lambda: user_util.user_cache.hits)
+            metrics.register_counter("jwt_user_cache_misses_total", "token 用户缓存未命中次数", lambda: user_util.user_cache.misses)
+            metrics.register_counter("sn_pool_hits_total", "流水号池直接取号次数", lambda: sn_pool.sum_sn_pool_stats("hits"))
+            metrics.register_counter("sn_pool_misses_total", "流水号池号码不足同步补号次数", lambda: sn_pool.sum_sn_pool_stats("misses"))
+            metrics.register_counter("sn_pool_refills_total", "流水号池补号次数", lambda: sn_pool.sum_sn_pool_stats("refill_count"))
+            metrics.register_counter(
+                "sn_pool_refill_seconds_total", "流水号池补号总耗时（秒）", lambda: sn_pool.sum_sn_pool_stats("refill_total_ms") / 1000
+            )
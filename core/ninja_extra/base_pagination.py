@@ -1,14 +1,289 @@
-from functools import wraps
-from typing import Callable, Generic, List, Optional, Type, TypeVar, Dict, Any
+import asyncio
+import base64
+import contextvars
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from enum import StrEnum
+from functools import partial, wraps
+from typing import Callable, Generic, List, Optional, Type, TypeVar, Dict, Any, Tuple
 
-from django.db.models import QuerySet
+import orjson
+from django.core.cache import cache
+from django.db import InterfaceError, OperationalError, connections
+from django.db.models import Q, QuerySet
 from ninja import Query, Schema, Field
+from pydantic import ConfigDict, ValidationError, create_model
+from core.conf import settings
+from core.exceptions.base_exceptions import SysException
+from core.status_codes import code_dict
 from core.utils.orjson_util import json
 
 T = TypeVar("T")
 
 
-class AsyncLimitOffsetPagination:
+class CountStrategy(StrEnum):
+    """分页总数统计策略"""
+
+    EXACT = "exact"  # 精确 COUNT(*)，与取数在同一连接、同一事务中执行
+    # 以下两种策略在统计线程池的独立连接中执行，读不到请求所在事务中未提交的数据
+    CACHED = "cached"  # 精确 COUNT(*) 结果缓存 PAGINATION_COUNT_CACHE_TTL 秒
+    ESTIMATE = "estimate"  # 数据库执行计划估算，估算值小于 PAGINATION_COUNT_ESTIMATE_THRESHOLD 时精确统计
+    HAS_NEXT = "has_next"  # 不统计总数，多取一条判断是否有下一页
+
+
+class FastPageOutput(dict):
+    """
+    分页结果快速输出：分页数据已是纯 dict（.values() 查询）时直接返回 dict，
+    由 BaseApi 用 orjson 序列化为响应，跳过 Pydantic 输出模型的构建与逐条校验
+    不做类型转换，需分页器显式开启 fast_output
+    """
+
+
+# 动态生成的分页输出模型缓存，key 为 (分页器类, 数据类型)
+_output_schemas: Dict[tuple, type] = {}
+
+# 数据 Schema 的快速输出字段缓存，value 为 [(字段名, 是否必填, 默认值)]，不满足快速输出条件时为 None
+_fast_fields: Dict[type, list | None] = {}
+
+
+def _get_fast_fields(item_schema: type) -> list | None:
+    """
+    数据 Schema 满足以下条件才能快速输出：没有自定义校验器/序列化器/resolve_ 方法、字段没有别名、没有 default_factory
+    否则必须经过 Pydantic 校验才能得到一致的输出
+    """
+    if item_schema in _fast_fields:
+        return _fast_fields[item_schema]
+
+    fields = None
+    model_fields = getattr(item_schema, "model_fields", None)
+    decorators = getattr(item_schema, "__pydantic_decorators__", None)
+    # ninja Schema 自带的 _run_root_validator 只用于按属性取值，对 dict 数据没有影响
+    model_validators = set(getattr(decorators, "model_validators", {})) - set(Schema.__pydantic_decorators__.model_validators)
+    if model_fields is not None and decorators is not None and not getattr(item_schema, "_ninja_resolvers", None) and not any((
+        decorators.validators,
+        decorators.field_validators,
+        decorators.root_validators,
+        decorators.field_serializers,
+        decorators.model_serializers,
+        model_validators,
+        decorators.computed_fields,
+    )):
+        fields = []
+        for name, field in model_fields.items():
+            if field.alias or field.default_factory is not None:
+                fields = None
+                break
+            fields.append((name, field.is_required(), field.default))
+    _fast_fields[item_schema] = fields
+    return fields
+
+
+def fast_items(item_schema: type | None, items: List) -> List[dict] | None:
+    """
+    按数据 Schema 的字段裁剪 dict 数据并补默认值，不能快速输出时返回 None
+    值原样输出，不按字段类型转换，调用方需保证值已是 Schema 的输出类型
+    """
+    if not item_schema or not items or not all(type(item) is dict for item in items):
+        return None
+    fields = _get_fast_fields(item_schema)
+    if fields is None:
+        return None
+
+    results = []
+    for item in items:
+        row = {}
+        for name, required, default in fields:
+            if name in item:
+                row[name] = item[name]
+            elif required:
+                return None  # 缺少必填字段，交给 Pydantic 校验报错
+            else:
+                row[name] = default
+        results.append(row)
+    return results
+
+
+class FilterField:
+    """分页筛选字段声明，lookup 为空时只做校验，由 afilter_queryset 自行处理"""
+
+    def __init__(self, lookup: str | None = None, type: Any = str, description: str = ""):
+        self.lookup = lookup  # ORM 查询条件，如 user__phone__contains
+        self.type = type  # 字段类型，用于校验和接口文档
+        self.description = description
+
+
+def _is_indexed(model, path: str) -> bool:
+    """ORM 字段路径最终指向的字段是否有索引（主键、唯一、db_index 或联合索引的首列）"""
+    *relations, name = path.split("__")
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    field = model._meta.get_field(name)
+    if field.primary_key or field.unique or field.db_index:
+        return True
+    return any(
+        index.fields and index.fields[0].lstrip("-") == field.name for index in model._meta.indexes
+    ) or any(together[0] == field.name for together in model._meta.unique_together)
+
+
+class FilterSortSpecMixin:
+    """
+    声明式筛选/排序：
+    filter_fields 为允许的筛选字段，sort_fields 为允许的排序字段（前端字段 -> 有索引的 ORM 字段）
+    类创建时编译为筛选校验模型和查询条件表，并写入 Input 的接口文档；为 None 时保持原有行为，不做校验
+
+    使用示例：
+    class Pagination(AsyncLimitOffsetPagination):
+        filter_fields = {
+            "phone": FilterField("user__phone__contains", str, "手机号"),
+            "month": FilterField(None, str, "月份，格式 yyyy-mm"),  # 在 afilter_queryset 中处理
+        }
+        sort_fields = {"sid": "id"}
+    """
+
+    filter_fields: Dict[str, FilterField] | None = None
+    sort_fields: Dict[str, str] | None = None
+
+    _filter_model: type | None = None  # 筛选条件校验模型，不允许未声明的字段
+    _filter_lookups: Tuple[Tuple[str, str], ...] = ()  # (筛选字段, ORM 查询条件)
+    _indexed_models: set  # 已校验过排序字段索引的模型
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._indexed_models = set()
+
+        input_fields = {}
+        if cls.filter_fields is not None:
+            cls._filter_model = create_model(
+                f"{cls.__name__}Filter",
+                __config__=ConfigDict(extra="forbid"),
+                **{
+                    name: (Optional[field.type], Field(None, description=field.description))
+                    for name, field in cls.filter_fields.items()
+                },
+            )
+            cls._filter_lookups = tuple(
+                (name, field.lookup) for name, field in cls.filter_fields.items() if field.lookup
+            )
+            fields_desc = "；".join(f"{name}: {field.description}" for name, field in cls.filter_fields.items())
+            input_fields["filter"] = (Optional[str], Field(None, description=f"筛选条件, json字符串, 可用字段 {fields_desc}"))
+        if cls.sort_fields is not None and "sort" in cls.Input.model_fields:
+            sort_desc = ", ".join(cls.sort_fields)
+            input_fields["sort"] = (Optional[str], Field(None, description=f"排序条件, json字符串列表, 可用字段 {sort_desc}, 字段前加 - 表示倒序"))
+        if input_fields:
+            cls.Input = create_model(f"{cls.__name__}Input", __base__=cls.Input, **input_fields)
+
+    async def afilter_queryset(self, queryset: QuerySet, input_filter: dict):
+        """过滤数据，根据前端传入的参数进行过滤"""
+        return queryset
+
+    async def _aapply_filter(self, queryset: QuerySet, filter_json: Optional[str]) -> QuerySet:
+        """前端传了 filter 才过滤，没传时不调用 afilter_queryset（其中的默认条件只对带 filter 的请求生效）"""
+        if not filter_json:
+            return queryset
+        if self._filter_model is None:
+            return await self.afilter_queryset(queryset, json.loads(filter_json))
+
+        try:
+            input_filter = self._filter_model.model_validate(json.loads(filter_json))
+        except (ValueError, ValidationError):
+            raise SysException(code_dict["5"], code="5")
+        input_filter = input_filter.model_dump(exclude_none=True)
+
+        conditions = {lookup: input_filter[name] for name, lookup in self._filter_lookups if input_filter.get(name) not in (None, "")}
+        if conditions:
+            queryset = queryset.filter(**conditions)
+        return await self.afilter_queryset(queryset, input_filter)
+
+    def _apply_sort(self, queryset: QuerySet, sort_json: Optional[str]) -> QuerySet:
+        if not sort_json:
+            return queryset
+        sort_list = json.loads(sort_json)
+        if self.sort_fields is None:
+            return queryset.order_by(*sort_list)
+
+        if not isinstance(sort_list, list):
+            raise SysException(code_dict["6"], code="6", data={"field": sort_json})
+        ordering = []
+        for item in sort_list:
+            name = item.lstrip("-") if isinstance(item, str) else item
+            field = self.sort_fields.get(name) if isinstance(name, str) else None
+            if field is None:
+                raise SysException(code_dict["6"], code="6", data={"field": name})
+            ordering.append(f"-{field}" if item.startswith("-") else field)
+        self._check_sort_indexes(queryset.model)
+        return queryset.order_by(*ordering)
+
+    async def aprepare_queryset(self, queryset: QuerySet, pagination_input: Schema) -> QuerySet:
+        """按分页参数中的 filter/sort 处理 queryset，分页与流式输出共用"""
+        queryset = await self._aapply_filter(queryset, pagination_input.filter)
+        return self._apply_sort(queryset, getattr(pagination_input, "sort", None))
+
+    @classmethod
+    def _check_sort_indexes(cls, model):
+        """排序字段必须有索引，每个模型只校验一次"""
+        if model in cls._indexed_models:
+            return
+        for name, path in cls.sort_fields.items():
+            if not _is_indexed(model, path):
+                raise SysException(f"排序字段[{name}]({path})没有索引", code="2")
+        cls._indexed_models.add(model)
+
+
+_count_executor: ThreadPoolExecutor | None = None
+
+
+def _run_count(func: Callable, *args):
+    """
+    在统计线程中执行，与请求线程使用不同的数据库连接
+    统计线程常驻，连接留在线程中复用，不按请求关闭（CONN_MAX_AGE=0 时 close_old_connections 每次都会重新连接）
+    连接失效（数据库重启、空闲超时断开）时关闭连接重试一次，统计是只读查询，可以重试
+    """
+    try:
+        return func(*args)
+    except (InterfaceError, OperationalError):
+        for connection in connections.all(initialized_only=True):
+            connection.close()
+    return func(*args)
+
+
+async def _arun_count(func: Callable, *args):
+    """
+    在独立线程池中执行统计，可以和取数（Django 异步 ORM 固定在同一个线程中执行）真正并发
+    统计使用独立数据库连接，看不到请求所在事务中未提交的数据，只用于 cached/estimate 策略
+    """
+    global _count_executor
+    if _count_executor is None:
+        _count_executor = ThreadPoolExecutor(
+            max_workers=settings.PAGINATION_COUNT_WORKERS, thread_name_prefix="pagination-count"
+        )
+    # 复制当前上下文，接口指标能统计到这里的查询
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        _count_executor, partial(context.run, _run_count, func, *args)
+    )
+
+
+def _estimate_count(queryset: QuerySet) -> int | None:
+    """用数据库执行计划估算行数，不支持的数据库返回 None"""
+    queryset = queryset.order_by()
+    sql, params = queryset.query.get_compiler(using=queryset.db).as_sql()
+    connection = connections[queryset.db]
+    with connection.cursor() as cursor:
+        if connection.vendor == "mysql":
+            cursor.execute(f"EXPLAIN {sql}", params)
+            columns = [col[0] for col in cursor.description]
+            row = dict(zip(columns, cursor.fetchone()))
+            return int((row["rows"] or 0) * float(row.get("filtered") or 100) / 100)
+        if connection.vendor == "postgresql":
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
+    return None
+
+
+class AsyncLimitOffsetPagination(FilterSortSpecMixin):
     """
     通用异步分页器（支持 Django ORM 同步/异步）
     支持自定义输入/输出字段映射
@@ -16,11 +291,19 @@ class AsyncLimitOffsetPagination:
 
     InputSource = Query
 
+    count_strategy: CountStrategy | str | None = None  # 总数统计策略，为空时使用 settings.PAGINATION_COUNT_STRATEGY
+    # 分页数据为纯 dict 时是否跳过输出模型直接输出（不做类型转换），
+    # 只在每个值已是数据 Schema 的输出类型时开启（如 Decimal 字段的值是 Decimal 而不是 int），否则输出与 Schema 不一致
+    fast_output: bool = False
+    item_schema: type | None = None  # 单条数据 Schema，由 paginate 传入接口的 response_schema
+
     # 默认输出字段映射，可在子类中覆盖
     output_field_map: Dict[str, str] = {
         "current_page": "current_page",
         "page_size": "page_size",
         "total_count": "total_count",
+        "total_exact": "total_exact",
+        "has_next": "has_next",
         "items": "items",
     }
 
@@ -41,64 +324,102 @@ class AsyncLimitOffsetPagination:
     class Output(Schema, Generic[T]):
         current_page: int = Field(..., description="当前页")
         page_size: int = Field(..., description="每页数量")
-        total_count: int = Field(..., description="总数量")
+        total_count: Optional[int] = Field(None, description="总数量，统计策略为 has_next 且还有下一页时为空")
+        total_exact: bool = Field(True, description="总数量是否精确")
+        has_next: bool = Field(False, description="是否有下一页")
         items: List[T] = Field(..., description="分页数据")
 
+    def __init__(self, count_strategy: CountStrategy | str | None = None):
+        self.count_strategy = CountStrategy(count_strategy or self.count_strategy or settings.PAGINATION_COUNT_STRATEGY)
+
     # ================= 可扩展 hook =================
     async def aprocess_result(self, results: List) -> List:
         """分页后处理结果，比如序列化或数据脱敏"""
         return results
 
     async def _aitems_count(self, queryset: QuerySet) -> int:
-        """统计总数，可子类重写以优化性能"""
+        """统计总数，可子类重写以优化性能；与取数使用同一数据库连接，能统计到请求所在事务中未提交的数据"""
         try:
             return await queryset.acount()
         except AttributeError:
             return queryset.count() if hasattr(queryset, "count") else len(queryset)
 
-    async def afilter_queryset(self, queryset: QuerySet, input_filter: dict):
-        """过滤数据，根据前端传入的参数进行过滤"""
-        return queryset
+    async def _acount(self, queryset: QuerySet) -> Tuple[int, bool]:
+        """按统计策略统计总数，返回 (总数, 是否精确)"""
+        if self.count_strategy == CountStrategy.CACHED and isinstance(queryset, QuerySet):
+            # 以 SQL 作为缓存键，包含了前端筛选条件以及接口自身的查询条件
+            key = "pagination:count:" + hashlib.md5(str(queryset.order_by().query).encode()).hexdigest()
+            total_count = await cache.aget(key)
+            if total_count is not None:
+                return total_count, False
+            total_count = await _arun_count(queryset.count)  # 在统计线程池中执行，读不到请求所在事务中未提交的数据
+            await cache.aset(key, total_count, settings.PAGINATION_COUNT_CACHE_TTL)
+            return total_count, True
+
+        if self.count_strategy == CountStrategy.ESTIMATE and isinstance(queryset, QuerySet):
+            estimate = await _arun_count(_estimate_count, queryset)
+            if estimate is not None and estimate >= settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD:
+                return estimate, False
+
+        return await self._aitems_count(queryset), True
 
     # ================= 内部工具方法 =================
     def _is_async_queryset(self, queryset: QuerySet) -> bool:
         """判断是否异步 QuerySet"""
         return hasattr(queryset, "aall") or hasattr(queryset, "__aiter__")
 
-    def output(self, current_page: int, page_size: int, total_count: int, items: List[T]) -> Schema:
+    async def _afetch_items(self, queryset: QuerySet, offset: int, limit: int) -> List:
+        if self._is_async_queryset(queryset):
+            return [obj async for obj in queryset[offset : offset + limit]]
+        return list(queryset[offset : offset + limit])
+
+    def output(
+        self,
+        current_page: int,
+        page_size: int,
+        total_count: Optional[int],
+        items: List[T],
+        total_exact: bool = True,
+        has_next: bool = False,
+    ) -> Schema:
         """
         构造输出 Schema
-        使用动态生成子类解决泛型 Pydantic 不能直接实例化的问题
+        使用动态生成子类解决泛型 Pydantic 不能直接实例化的问题，生成的子类按 (分页器类, 数据类型) 缓存
+        数据为纯 dict 时直接返回 FastPageOutput，不构建输出模型
         """
-        # 动态创建 Output 子类，指定泛型类型 T
-        OutputSchema = type(
-            "OutputSchema",
-            (self.Output,),
-            {"__annotations__": {"current_page": int, "page_size": int, "total_count": int, "items": List[type(items[0]) if items else Any]}}
-        )
-
         payload = {
             self.output_field_map["current_page"]: current_page,
             self.output_field_map["page_size"]: page_size,
             self.output_field_map["total_count"]: total_count,
+            self.output_field_map.get("total_exact", "total_exact"): total_exact,
+            self.output_field_map.get("has_next", "has_next"): has_next,
             self.output_field_map["items"]: items,
         }
 
+        if self.fast_output:
+            rows = fast_items(self.item_schema, items)
+            if rows is not None:
+                payload[self.output_field_map["items"]] = rows
+                return FastPageOutput(payload)
+
+        # 优先使用接口的数据 Schema，模型对象也能按属性校验
+        item_type = self.item_schema or (type(items[0]) if items else Any)
+        key = (type(self), item_type)
+        OutputSchema = _output_schemas.get(key)
+        if OutputSchema is None:
+            # 动态创建 Output 子类，指定泛型类型 T
+            OutputSchema = _output_schemas[key] = type(
+                "OutputSchema",
+                (self.Output,),
+                {"__annotations__": {"current_page": int, "page_size": int, "total_count": Optional[int], "items": List[item_type]}}
+            )
+
         return OutputSchema(**payload)
 
     # ================= 主流程 =================
     async def apaginate_queryset(self, queryset: QuerySet, pagination_input: Input) -> Schema:
-        # 过滤条件
-        filter_json = pagination_input.filter
-        if filter_json:
-            filter_dict = json.loads(filter_json)
-            queryset = await self.afilter_queryset(queryset, filter_dict)
-
-        # 排序条件
-        sort_json = pagination_input.sort
-        if sort_json:
-            sort_list = json.loads(sort_json)
-            queryset = queryset.order_by(*sort_list)
+        # 过滤、排序条件
+        queryset = await self.aprepare_queryset(queryset, pagination_input)
 
         # 使用 input_field_map 获取分页参数
         page = getattr(pagination_input, self.input_field_map["page"])
@@ -106,21 +427,167 @@ class AsyncLimitOffsetPagination:
         offset = (page - 1) * page_size
         limit = page_size
 
-        total_count = await self._aitems_count(queryset)
-
-        # 获取分页数据
-        if self._is_async_queryset(queryset):
-            items = [obj async for obj in queryset[offset : offset + limit]]
+        # 多取一条判断是否有下一页；cached/estimate 策略的统计在统计线程池中执行，与取数并发
+        if self.count_strategy == CountStrategy.HAS_NEXT:
+            items = await self._afetch_items(queryset, offset, limit + 1)
+            total_count, total_exact = None, False
         else:
-            items = list(queryset[offset : offset + limit])
+            (total_count, total_exact), items = await asyncio.gather(
+                self._acount(queryset),
+                self._afetch_items(queryset, offset, limit + 1),
+            )
+        has_next = len(items) > limit
+        items = items[:limit]
+        if not has_next and (items or offset == 0):  # 最后一页可以直接得到精确总数
+            total_count, total_exact = offset + len(items), True
 
         items = await self.aprocess_result(items)
 
-        return self.output(page, page_size, total_count, items)
+        return self.output(page, page_size, total_count, items, total_exact, has_next)
+
+
+class AsyncKeysetPagination(FilterSortSpecMixin):
+    """
+    异步游标分页器（keyset），按排序键定位下一页，不使用 OFFSET，深翻页耗时不变
+    游标对前端不透明，编码了翻页方向和当前页首/尾行的排序键；total_count 需前端显式请求
+    ordering 中的字段需是模型字段或 annotate 的别名（不支持跨表 __ 路径），最后一个字段需唯一
+    """
+
+    InputSource = Query
+
+    ordering: Tuple[str, ...] = ("-id",)  # 排序键，可在子类中覆盖
+    # 分页数据为纯 dict 时是否跳过输出模型直接输出（不做类型转换），
+    # 只在每个值已是数据 Schema 的输出类型时开启（如 Decimal 字段的值是 Decimal 而不是 int），否则输出与 Schema 不一致
+    fast_output: bool = False
+    item_schema: type | None = None  # 单条数据 Schema，由 paginate 传入接口的 response_schema
+
+    # ================= 输入 Schema =================
+    # 类名与 AsyncLimitOffsetPagination 区分开，避免 OpenAPI 中同名 Schema 互相覆盖
+    class KeysetInput(Schema):
+        cursor: Optional[str] = Field(None, description="分页游标，取上一次返回的 next_cursor/prev_cursor，为空时取第一页")
+        page_size: int = Field(default=15, ge=1, le=500, description="每页数量，最大500")
+        with_total: bool = Field(default=False, description="是否返回总数量")
+        filter: Optional[str] = Field(None, description="筛选条件, json字符串")
+
+    # ================= 输出 Schema =================
+    class KeysetOutput(Schema, Generic[T]):
+        page_size: int = Field(..., description="每页数量")
+        total_count: Optional[int] = Field(None, description="总数量，with_total 为 true 时返回")
+        next_cursor: Optional[str] = Field(None, description="下一页游标，为空表示没有下一页")
+        prev_cursor: Optional[str] = Field(None, description="上一页游标，为空表示没有上一页")
+        items: List[T] = Field(..., description="分页数据")
+
+    Input = KeysetInput
+    Output = KeysetOutput
+
+    # ================= 可扩展 hook =================
+    async def aprocess_result(self, results: List) -> List:
+        """分页后处理结果，比如序列化或数据脱敏"""
+        return results
+
+    async def _aitems_count(self, queryset: QuerySet) -> int:
+        """统计总数，可子类重写以优化性能"""
+        return await queryset.acount()
+
+    # ================= 游标 =================
+    def encode_cursor(self, direction: str, values: list) -> str:
+        raw = orjson.dumps({"d": direction, "v": values}, default=str)
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, cursor: str) -> Tuple[str, list]:
+        try:
+            data = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            direction, values = data["d"], data["v"]
+        except (ValueError, TypeError, KeyError):
+            raise SysException(code_dict["4"], code="4")
+        if direction not in ("n", "p") or not isinstance(values, list) or len(values) != len(self.ordering):
+            raise SysException(code_dict["4"], code="4")
+        return direction, values
+
+    # ================= 内部工具方法 =================
+    def _keyset_filter(self, values: list, reverse: bool) -> Q:
+        """
+        生成 (f1, f2, ...) 排在游标之后的条件：
+        f1 > v1 OR (f1 = v1 AND f2 > v2) OR ...，降序字段用 <，reverse 时方向取反
+        """
+        condition = Q()
+        equals = {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip("-")
+            descending = field.startswith("-") != reverse
+            condition |= Q(**equals, **{f"{name}__{'lt' if descending else 'gt'}": value})
+            equals[name] = value
+        return condition
+
+    def _row_key(self, row) -> list:
+        names = [field.lstrip("-") for field in self.ordering]
+        if isinstance(row, dict):
+            return [row[name] for name in names]
+        return [getattr(row, name) for name in names]
+
+    def output(self, page_size: int, total_count: Optional[int], next_cursor: Optional[str], prev_cursor: Optional[str], items: List[T]) -> Schema:
+        payload = {
+            "page_size": page_size,
+            "total_count": total_count,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+            "items": items,
+        }
+        if self.fast_output:
+            rows = fast_items(self.item_schema, items)
+            if rows is not None:
+                payload["items"] = rows
+                return FastPageOutput(payload)
+        return self.Output(**payload)
+
+    async def aprepare_queryset(self, queryset: QuerySet, pagination_input: KeysetInput) -> QuerySet:
+        queryset = await self._aapply_filter(queryset, pagination_input.filter)
+        return queryset.order_by(*self.ordering)
+
+    # ================= 主流程 =================
+    async def apaginate_queryset(self, queryset: QuerySet, pagination_input: KeysetInput) -> Schema:
+        # 过滤条件
+        queryset = await self._aapply_filter(queryset, pagination_input.filter)
+
+        page_size = pagination_input.page_size
+        total_count = await self._aitems_count(queryset) if pagination_input.with_total else None
+
+        # 向前翻页时反向排序取数，再把结果倒回来
+        direction, values = self.decode_cursor(pagination_input.cursor) if pagination_input.cursor else ("n", None)
+        backward = direction == "p"
+        if values is not None:
+            queryset = queryset.filter(self._keyset_filter(values, reverse=backward))
+        ordering = [field[1:] if field.startswith("-") else f"-{field}" for field in self.ordering] if backward else self.ordering
+        queryset = queryset.order_by(*ordering)
+
+        # 多取一条判断是否还有数据
+        rows = [obj async for obj in queryset[: page_size + 1]]
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if backward:
+            rows.reverse()
+            has_next, has_prev = True, has_more
+        else:
+            has_next, has_prev = has_more, values is not None
+
+        next_cursor = self.encode_cursor("n", self._row_key(rows[-1])) if rows and has_next else None
+        prev_cursor = self.encode_cursor("p", self._row_key(rows[0])) if rows and has_prev else None
+
+        items = await self.aprocess_result(rows)
+
+        return self.output(page_size, total_count, next_cursor, prev_cursor, items)
 
 
 # ================= 分页装饰器 =================
-def paginate(pagination_class: Type[AsyncLimitOffsetPagination]):
+def paginate(
+    pagination_class: Type[AsyncLimitOffsetPagination] | Type[AsyncKeysetPagination],
+    count_strategy: CountStrategy | str | None = None,
+    item_schema: type | None = None,
+):
+    if count_strategy and not issubclass(pagination_class, AsyncLimitOffsetPagination):
+        # 游标分页不按策略统计总数（前端通过 with_total 显式请求），注册接口时就报错
+        raise SysException(f"分页器[{pagination_class.__name__}]不支持总数统计策略[{count_strategy}]", code="2")
+
     def decorator(func: Callable):
         @wraps(func)
         async def wrapper(*args, ninja_pagination=None, **kwargs):
@@ -130,7 +597,8 @@ def paginate(pagination_class: Type[AsyncLimitOffsetPagination]):
             # 执行原函数获取 queryset
             queryset = await func(*args, **kwargs)
 
-            paginator = pagination_class()
+            paginator = pagination_class(count_strategy=count_strategy) if count_strategy else pagination_class()
+            paginator.item_schema = item_schema
             return await paginator.apaginate_queryset(queryset, pagination_input)
 
         return wrapper
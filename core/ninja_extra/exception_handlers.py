@@ -9,8 +9,8 @@
 """
 import logging
 
-from django.http import JsonResponse
 from core.exceptions.base_exceptions import BaseException
+from core.ninja_extra.renderers import json_response
 from core.ninja_extra.response_schema import ErrorResponse, BaseLevel, ResponseLevel
 from core.status_codes import code_dict
 
@@ -26,13 +26,13 @@ def base_exception_handler(request, e: BaseException):
     else:
         level = ResponseLevel.ERROR
     logger.error(f"系统异常 - 错误码:[{code}]; 错误消息:[{message}]")
-    return JsonResponse(data=ErrorResponse(code=code, msg=message, level=level).model_dump(), status=200)
+    return json_response(ErrorResponse(code=code, msg=message, level=level), request=request)
 
 
 def finally_exception_handler(request, e: Exception):
     """最终异常处理"""
     logger.error(f"未知异常",  exc_info=True)
-    return JsonResponse(data=ErrorResponse(
+    return json_response(ErrorResponse(
         code="1",
         msg=code_dict.get("1", "未知异常")
-    ).model_dump(), status=200)
\ No newline at end of file
+    ), request=request)
\ No newline at end of file
@@ -0,0 +1,179 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : api_benchmark.py
+# Time       : 2025-10-19 00:41:08
+# Author     : lyx
+# version    : python 3.11
+# Description: ASGI 接口压测，对比同步中间件与异步中间件的吞吐量和延迟
+"""
+import asyncio
+import statistics
+import time
+from typing import List, Tuple
+
+from django.conf import settings as django_settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+from core.conf import settings
+from core.middlewares.base_middleware import BaseMiddleware
+from core.utils import token_util
+
+
+class Command(BaseCommand):
+    help = (
+        "在进程内直接调用 ASGIHandler 压测接口（不经过网络），对比两种中间件链路的 requests/s 和 p99："
+        "同步中间件（改造前，自定义中间件只支持同步，异步视图每个请求切换线程）、异步中间件（当前）"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default=f"/{settings.NINJA_BASE_URL}staff/salary/basic_disbursement_list",
+            type=str,
+            help="接口地址, 默认查询未发放工资列表",
+        )
+        parser.add_argument(
+            "--method",
+            default="POST",
+            type=str,
+            help="请求方法, 默认POST",
+        )
+        parser.add_argument(
+            "--body",
+            default="{}",
+            type=str,
+            help="请求体（json）, 默认{}",
+        )
+        parser.add_argument(
+            "--uid",
+            default=None,
+            type=int,
+            help="生成 token 的用户 id, 默认不带 token（接口返回未登录）",
+        )
+        parser.add_argument(
+            "--requests",
+            default=2000,
+            type=int,
+            help="每种链路的请求数, 默认2000",
+        )
+        parser.add_argument(
+            "--concurrency",
+            default=50,
+            type=int,
+            help="并发数, 默认50",
+        )
+        parser.add_argument(
+            "--host",
+            default="localhost",
+            type=str,
+            help="Host 请求头, 需在 ALLOWED_HOSTS 中, 默认localhost",
+        )
+
+    def handle(self, *args, **options):
+        scope = self.make_scope(options)
+        body = options["body"].encode("utf-8")
+        cases = {
+            "同步中间件": True,
+            "异步中间件": False,
+        }
+        for name, sync_only in cases.items():
+            handler = self.make_handler(sync_only)
+            costs, statuses, elapsed = asyncio.run(
+                self.run(handler, scope, body, options["requests"], options["concurrency"])
+            )
+            p50, p99 = statistics.median(costs), statistics.quantiles(costs, n=100)[98]
+            self.stdout.write(
+                f"{name}: requests={len(costs)} concurrency={options['concurrency']} "
+                f"status={dict(sorted(statuses.items()))} rps={len(costs) / elapsed:.0f} "
+                f"p50={p50:.2f}ms p99={p99:.2f}ms max={max(costs):.2f}ms"
+            )
+
+    def make_handler(self, sync_only: bool) -> ASGIHandler:
+        """sync_only 时自定义中间件按只支持同步加载，与改造前一致"""
+        patched = []
+        if sync_only:
+            for path in django_settings.MIDDLEWARE:
+                middleware = import_string(path)
+                if issubclass(middleware, BaseMiddleware):
+                    middleware.async_capable = False
+                    patched.append(middleware)
+        try:
+            return ASGIHandler()  # 初始化时按 async_capable 加载中间件链路
+        finally:
+            for middleware in patched:
+                del middleware.async_capable
+
+    def make_scope(self, options) -> dict:
+        path, _, query_string = options["path"].partition("?")
+        headers = [
+            (b"host", options["host"].encode()),
+            (b"content-type", b"application/json"),
+        ]
+        if options["uid"] is not None:
+            token = token_util.create_token({"uid": options["uid"]}, settings.SECRET_KEY)
+            if settings.TOKEN_ORIGIN == "cookie":
+                headers.append((b"cookie", f"{settings.TOKEN_TAG}={token}".encode()))
+            else:
+                headers.append((settings.TOKEN_TAG.lower().encode(), f"Bearer {token}".encode()))
+        return {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": options["method"].upper(),
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query_string.encode(),
+            "root_path": "",
+            "headers": headers,
+            "client": ("127.0.0.1", 0),
+            "server": (options["host"], 80),
+        }
+
+    async def run(self, handler, scope, body, count, concurrency) -> Tuple[List[float], dict, float]:
+        """先预热，再用 concurrency 个协程发送 count 个请求，返回 (每个请求耗时ms, 状态码统计, 总耗时秒)"""
+        for _ in range(min(count, 20)):
+            await self.request(handler, scope, body)
+
+        costs = []
+        statuses = {}
+        remaining = count
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                cost, status = await self.request(handler, scope, body)
+                costs.append(cost)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return costs, statuses, time.perf_counter() - start
+
+    async def request(self, handler, scope, body) -> Tuple[float, int]:
+        received = False
+        finished = asyncio.Event()
+        status = 0
+
+        async def receive():
+            nonlocal received
+            if not received:
+                received = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await finished.wait()  # 请求处理完之前不断开连接
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                finished.set()
+
+        start = time.perf_counter()
+        await handler(dict(scope), receive, send)
+        return (time.perf_counter() - start) * 1000, status
@@ -0,0 +1,93 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : render_benchmark.py
+# Time       : 2025-10-18 21:32:54
+# Author     : lyx
+# version    : python 3.11
+# Description: 接口响应序列化性能测试
+"""
+import statistics
+import time
+from decimal import Decimal
+from typing import List
+
+from django.core.management.base import BaseCommand
+from ninja.renderers import JSONRenderer
+from pydantic import TypeAdapter
+
+from core.ninja_extra.api_extra import _SUCCESS_ENVELOPE
+from core.ninja_extra.renderers import ORJSONRenderer
+from core.ninja_extra.response_schema import ErrorResponse, SuccessResponse
+from core.utils import orjson_util
+from staff.views import schemas
+
+SCHEMAS = {
+    "basic": schemas.BasicSalaryListItemSchema,
+    "hourly": schemas.HourlyStaffSalaryListItemSchema,
+}
+
+
+class Command(BaseCommand):
+    help = "测试工资列表接口成功响应的序列化耗时：ninja 默认渲染、orjson 渲染、信任模式（跳过响应模型校验）"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            default=500,
+            type=int,
+            help="每次响应的数据条数, 默认500",
+        )
+        parser.add_argument(
+            "--repeat",
+            default=50,
+            type=int,
+            help="重复次数, 默认50",
+        )
+        parser.add_argument(
+            "--schema",
+            default="basic",
+            type=str,
+            help="数据结构, 默认basic",
+            choices=list(SCHEMAS),
+        )
+
+    def handle(self, *args, **options):
+        item_schema = SCHEMAS[options["schema"]]
+        rows = self.make_rows(item_schema, options["rows"])
+        # 与 NinjaAPIExtra 注册接口时的响应模型一致
+        response_adapter = TypeAdapter(SuccessResponse[List[item_schema]] | ErrorResponse[None])
+        json_renderer = JSONRenderer()
+        orjson_renderer = ORJSONRenderer()
+
+        def validated():
+            response = SuccessResponse.model_construct(data=rows)
+            return response_adapter.validate_python(response, from_attributes=True).model_dump()
+
+        cases = {
+            "ninja默认渲染": lambda: json_renderer.render(None, validated(), response_status=200),
+            "orjson渲染": lambda: orjson_renderer.render(None, validated(), response_status=200),
+            "信任模式": lambda: orjson_util.dumps_django({**_SUCCESS_ENVELOPE, "data": rows}),
+        }
+        for name, func in cases.items():
+            costs = []
+            size = 0
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                size = len(func())
+                costs.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(
+                f"{name}: schema={options['schema']} rows={options['rows']} repeat={options['repeat']} bytes={size} "
+                f"min={min(costs):.2f}ms median={statistics.median(costs):.2f}ms max={max(costs):.2f}ms"
+            )
+
+    def make_rows(self, item_schema, count) -> List[dict]:
+        """按数据结构生成 .values() 形式的数据"""
+        values = {int: 1, str: "张三13800000000", Decimal: Decimal("12345.67")}
+        rows = []
+        for i in range(count):
+            row = {}
+            for name, field in item_schema.model_fields.items():
+                row[name] = values.get(field.annotation, None) if name != "sid" else i
+            rows.append(row)
+        return rows
@@ -12,6 +12,7 @@ import socket
 
 from django.core.management.base import BaseCommand
 from core.conf import settings
+from core.ninja_extra import metrics
 
 
 logger = logging.getLogger(__name__)
@@ -143,6 +144,8 @@ class Command(BaseCommand):
             ip_admin_url = f"{url_ip_prefix}/admin/",
         )
 
+        metrics.clear_dir()  # 清空上次运行留下的进程指标，worker 启动后各自写入
+
         uvicorn.run(
             f"{asgi_module}:{asgi_application}",
             host=options["host"],
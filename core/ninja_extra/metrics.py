@@ -0,0 +1,394 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : metrics.py
+# Time       : 2025-10-18 22:10:42
+# Author     : lyx
+# version    : python 3.11
+# Description: 接口指标，按接口码、响应码记录耗时、数据库耗时、查询次数、响应大小，导出 Prometheus 文本格式
+                多进程部署时每个进程定时把本进程指标写入 METRICS_DIR/<pid>.json，导出时合并所有进程的文件
+                已退出进程的指标合并到 METRICS_DIR/_dead.json 后删除原文件，导出的计数不会因 worker 重启而减少
+                导出地址只允许 METRICS_ALLOWED_IPS 中的地址访问
+"""
+import atexit
+import contextlib
+import glob
+import ipaddress
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, List, Tuple
+
+try:
+    import fcntl
+except ImportError:  # windows 不检查进程是否退出，也就不用合并文件，不需要文件锁
+    fcntl = None
+
+import orjson
+from django.http import HttpRequest, HttpResponse, HttpResponseForbidden
+
+from core.conf import settings
+from core.exceptions.base_exceptions import BaseException as CoreBaseException
+
+logger = logging.getLogger(__name__)
+
+DURATION = "ninja_api_duration_seconds"
+DB_DURATION = "ninja_api_db_duration_seconds"
+DB_QUERIES = "ninja_api_db_queries"
+RESPONSE_BYTES = "ninja_api_response_bytes"
+
+# 指标名: (说明, 桶上限)
+METRICS = {
+    DURATION: ("接口处理耗时（秒）", (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)),
+    DB_DURATION: ("接口数据库耗时（秒）", (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)),
+    DB_QUERIES: ("接口数据库查询次数", (0, 1, 2, 3, 5, 10, 20, 50, 100)),
+    RESPONSE_BYTES: ("接口响应大小（字节）", (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)),
+}
+
+Labels = Tuple[str, str]  # (接口码, 响应码)
+
+# 指标名 -> 标签 -> [各桶计数..., +Inf 桶计数, 总和]，桶计数不累加，导出时再累加
+_series: Dict[str, Dict[Labels, List[float]]] = defaultdict(dict)
+# 计数器：指标名 -> (说明, 取本进程计数的函数)，计数由各模块自己维护，写入文件时取值，导出时各进程求和
+_counters: Dict[str, Tuple[str, Callable[[], float]]] = {}
+_lock = threading.Lock()
+_last_flush = 0.0
+_dirty = False  # 上次写入文件后是否记录过指标
+_flushed_counters: Dict[str, float] | None = None  # 上次写入文件的计数器，None 表示还没写入过
+
+
+def observe(name: str, labels: Labels, value: float):
+    global _dirty
+    buckets = METRICS[name][1]
+    with _lock:
+        _dirty = True
+        values = _series[name].get(labels)
+        if values is None:
+            values = _series[name][labels] = [0] * (len(buckets) + 2)
+        values[bisect_left(buckets, value)] += 1
+        values[-1] += value
+
+
+def register_counter(name: str, help_text: str, getter: Callable[[], float]):
+    """注册计数器，如 token 缓存命中次数"""
+    _counters[name] = (help_text, getter)
+
+
+def _counter_values() -> Dict[str, float]:
+    return {name: getter() for name, (_, getter) in _counters.items()}
+
+
+# ================= 数据库查询统计 =================
+class _QueryStats:
+    __slots__ = ("count", "duration")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+# 当前接口的查询统计，ORM 在 sync_to_async 线程中执行时 contextvar 会随上下文传递
+_query_stats: ContextVar[_QueryStats | None] = ContextVar("api_query_stats", default=None)
+
+
+def _query_wrapper(execute, sql, params, many, context):
+    stats = _query_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.count += 1
+        stats.duration += time.perf_counter() - start
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    """connection_created 信号接收器，给数据库连接挂上查询统计"""
+    if _query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_query_wrapper)
+
+
+# ================= 接口埋点 =================
+def observe_response_size(request: HttpRequest | None, size: int):
+    """记录响应大小，标签由 instrument 记录在 request 上，渲染器、异常处理调用"""
+    labels = getattr(request, "_api_metrics_labels", None)
+    if labels is not None:
+        observe(RESPONSE_BYTES, labels, size)
+        request._api_metrics_labels = None
+
+
+def instrument(interface_code: Callable[[], str]):
+    """
+    接口埋点装饰器，在 BaseApi 包装链的最外层
+    响应码：正常返回为 0，系统异常取异常码，其它异常为 1
+    """
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(request, *args, **kwargs):
+            stats = _QueryStats()
+            token = _query_stats.set(stats)
+            start = time.perf_counter()
+            code = "0"
+            response = None
+            try:
+                response = await func(request, *args, **kwargs)
+                return response
+            except CoreBaseException as e:
+                code = str(e.code)
+                raise
+            except Exception:
+                code = "1"
+                raise
+            finally:
+                _query_stats.reset(token)
+                labels = (str(interface_code()), code)
+                observe(DURATION, labels, time.perf_counter() - start)
+                observe(DB_DURATION, labels, stats.duration)
+                observe(DB_QUERIES, labels, stats.count)
+                if isinstance(response, HttpResponse):
+                    observe(RESPONSE_BYTES, labels, len(response.content))
+                elif not getattr(response, "streaming", False):
+                    request._api_metrics_labels = labels  # 响应由 ninja 渲染后再记录大小
+                _maybe_flush()
+
+        return wrapper
+
+    return decorator
+
+
+# ================= 多进程合并 =================
+DEAD_FILE = "_dead.json"  # 已退出进程的指标累计
+
+
+def _metrics_file(pid: int) -> str:
+    return os.path.join(settings.METRICS_DIR, f"{pid}.json")
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name != "posix":
+        return True  # windows 上 os.kill 会结束进程，不检查
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _snapshot() -> dict:
+    global _dirty
+    with _lock:
+        histograms = {name: [[*labels, *values] for labels, values in series.items()] for name, series in _series.items()}
+        _dirty = False
+    return {"histograms": histograms, "counters": _counter_values()}
+
+
+def flush():
+    """
+    本进程指标写入文件，先写临时文件再替换，读取时不会读到半个文件
+    没有记录过指标（直方图、计数器都没有变化）时不写，manage.py 命令等进程不会留下文件
+    """
+    global _last_flush, _flushed_counters
+    if not settings.METRICS_DIR:
+        return
+    _last_flush = time.monotonic()
+    counters = _counter_values()
+    if not _dirty and counters == (_flushed_counters or dict.fromkeys(counters, 0)):
+        return
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    path = _metrics_file(os.getpid())
+    tmp_path = f"{path}.tmp"
+    snapshot = _snapshot()
+    with open(tmp_path, "wb") as f:
+        f.write(orjson.dumps(snapshot))
+    os.replace(tmp_path, path)
+    _flushed_counters = snapshot["counters"]
+
+
+def _maybe_flush():
+    if time.monotonic() - _last_flush >= settings.METRICS_FLUSH_INTERVAL:
+        try:
+            flush()
+        except OSError:
+            logger.warning("接口指标写入失败", exc_info=True)
+
+
+def clear_dir():
+    """清空多进程指标目录（包括已退出进程的累计），服务启动时（启动 worker 之前）调用，所有计数从 0 开始"""
+    if not settings.METRICS_DIR:
+        return
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, "*.json")):
+        os.remove(path)
+
+
+def _read_snapshot(path: str) -> dict | None:
+    try:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+
+
+def _merge_snapshot(histograms: Dict[str, Dict[Labels, List[float]]], counters: Dict[str, float], snapshot: dict):
+    for name, rows in snapshot.get("histograms", {}).items():
+        if name not in METRICS:
+            continue
+        series = histograms[name]
+        for interface_code, code, *values in rows:
+            labels = (interface_code, code)
+            if labels in series:
+                series[labels] = [a + b for a, b in zip(series[labels], values)]
+            else:
+                series[labels] = values
+    for name, value in snapshot.get("counters", {}).items():
+        counters[name] += value
+
+
+@contextlib.contextmanager
+def _dir_lock(exclusive: bool):
+    """指标目录的文件锁：合并已退出进程的文件时加排它锁，读取所有文件时加共享锁，不会重复或漏算"""
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(settings.METRICS_DIR, ".lock"), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _fold_dead_processes(paths: List[str]):
+    """已退出进程（worker 重启、manage.py 命令）的指标累加到 _dead.json 后删除原文件，文件不会越积越多"""
+    dead_path = os.path.join(settings.METRICS_DIR, DEAD_FILE)
+    with _dir_lock(exclusive=True):
+        histograms: Dict[str, Dict[Labels, List[float]]] = defaultdict(dict)
+        counters: Dict[str, float] = defaultdict(int)
+        _merge_snapshot(histograms, counters, _read_snapshot(dead_path) or {})
+        folded = []
+        for path in paths:
+            snapshot = _read_snapshot(path)  # 其它进程可能已经合并并删除了
+            if snapshot is not None:
+                _merge_snapshot(histograms, counters, snapshot)
+                folded.append(path)
+        if not folded:
+            return
+        tmp_path = f"{dead_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps({
+                "histograms": {name: [[*labels, *values] for labels, values in series.items()] for name, series in histograms.items()},
+                "counters": counters,
+            }))
+        os.replace(tmp_path, dead_path)
+        for path in folded:
+            os.remove(path)
+
+
+def collect() -> Tuple[Dict[str, Dict[Labels, List[float]]], Dict[str, float]]:
+    """合并所有进程的指标，返回 (直方图, 计数器)，未配置 METRICS_DIR 时只返回本进程指标"""
+    if not settings.METRICS_DIR:
+        with _lock:
+            histograms = {name: {labels: list(values) for labels, values in series.items()} for name, series in _series.items()}
+        return histograms, _counter_values()
+
+    flush()
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    paths = glob.glob(os.path.join(settings.METRICS_DIR, "*.json"))
+    dead = [
+        path for path in paths
+        if (pid := os.path.basename(path)[:-len(".json")]).isdigit() and not _pid_alive(int(pid))
+    ]
+    if dead:
+        try:
+            _fold_dead_processes(dead)
+        except OSError:
+            logger.warning("合并已退出进程的接口指标失败", exc_info=True)
+
+    histograms: Dict[str, Dict[Labels, List[float]]] = defaultdict(dict)
+    counters: Dict[str, float] = defaultdict(int)
+    with _dir_lock(exclusive=False):
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, "*.json")):
+            snapshot = _read_snapshot(path)
+            if snapshot is not None:
+                _merge_snapshot(histograms, counters, snapshot)
+    return histograms, {name: value for name, value in counters.items() if name in _counters}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render() -> str:
+    """Prometheus 文本格式"""
+    lines = []
+    histograms, counters = collect()
+    for name, value in sorted(counters.items()):
+        lines.append(f"# HELP {name} {_counters[name][0]}")
+        lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name} {_number(value)}")
+    for name, series in sorted(histograms.items()):
+        help_text, buckets = METRICS[name]
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for (interface_code, code), values in sorted(series.items()):
+            label = f'interface="{_escape(interface_code)}",code="{_escape(code)}"'
+            cumulative = 0
+            for bucket, count in zip((*buckets, "+Inf"), values):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{label},le="{bucket}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{label}}} {_number(values[-1])}")
+            lines.append(f"{name}_count{{{label}}} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def _allowed_networks():
+    return [ipaddress.ip_network(item, strict=False) for item in settings.METRICS_ALLOWED_IPS]
+
+
+def is_allowed(request: HttpRequest) -> bool:
+    """按 REMOTE_ADDR 判断，经过反向代理时要在代理上限制导出地址的访问"""
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(address in network for network in _allowed_networks())
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    if not is_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def _reset_after_fork():
+    """fork 出的子进程不继承父进程的指标及写入状态"""
+    global _lock, _dirty, _last_flush, _flushed_counters
+    _lock = threading.Lock()
+    _series.clear()
+    _dirty = False
+    _last_flush = 0.0
+    _flushed_counters = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+@atexit.register
+def _flush_at_exit():
+    """退出前写入最后一次记录的指标，没有记录过指标时不写文件"""
+    try:
+        flush()
+    except OSError:
+        pass
@@ -0,0 +1,36 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : renderers.py
+# Time       : 2025-10-18 21:05:18
+# Author     : lyx
+# version    : python 3.11
+# Description: orjson 响应渲染，Decimal、日期时间的格式与 ninja 默认渲染器一致
+"""
+from typing import Any
+
+from django.http import HttpRequest, HttpResponse
+from ninja.renderers import BaseRenderer
+
+from core.ninja_extra import metrics
+from core.utils import orjson_util
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = "application/json"
+
+    def render(self, request: HttpRequest, data: Any, *, response_status: int) -> bytes:
+        content = orjson_util.dumps_django(data)
+        metrics.observe_response_size(request, len(content))
+        return content
+
+
+def json_response(data: Any, status: int = 200, request: HttpRequest | None = None) -> HttpResponse:
+    """
+    orjson 序列化的 JSON 响应，替代 JsonResponse，data 可以是 Pydantic 模型
+    传入 request 时记录接口响应大小
+    """
+    content = orjson_util.dumps_django(data)
+    if request is not None:
+        metrics.observe_response_size(request, len(content))
+    return HttpResponse(content, status=status, content_type=ORJSONRenderer.media_type)
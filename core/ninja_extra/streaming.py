@@ -0,0 +1,186 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : streaming.py
+# Time       : 2025-10-18 20:12:36
+# Author     : lyx
+# version    : python 3.11
+# Description: 列表接口流式输出（NDJSON/CSV），分批序列化输出，不分页、不统计总数
+"""
+import csv
+import datetime
+import decimal
+import logging
+import uuid
+from enum import StrEnum
+from functools import wraps
+from typing import AsyncIterator, Callable, List, Optional, Type
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+from ninja import Field, Schema
+
+from core.conf import settings
+from core.ninja_extra.base_pagination import AsyncKeysetPagination, AsyncLimitOffsetPagination, fast_items
+from core.ninja_extra.response_schema import ErrorResponse
+from core.utils import orjson_util
+
+logger = logging.getLogger(__name__)
+
+_django_encoder = DjangoJSONEncoder()
+
+
+CSV_ERROR_MARKER = "#ERROR"  # CSV 输出中途出错时末尾错误行的首列
+
+
+class StreamFormat(StrEnum):
+    """流式输出格式"""
+
+    NDJSON = "ndjson"  # 每行一条 json 数据
+    CSV = "csv"
+
+
+class StreamInput(Schema):
+    format: Optional[StreamFormat] = Field(None, description="流式输出格式 ndjson/csv，为空时按普通接口返回，流式输出不分页、不统计总数")
+
+
+class _Echo:
+    """csv.writer 的写入目标，直接返回写入的行"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    """日期时间、Decimal 等类型的格式与 json 输出一致"""
+    if isinstance(value, (datetime.date, datetime.time, datetime.timedelta, decimal.Decimal, uuid.UUID)):
+        return _django_encoder.default(value)
+    return value
+
+
+class StreamOutput:
+    """
+    流式输出结果，由 BaseApi 转换为 StreamingHttpResponse
+    queryset 用 aiterator 分批读取，每批经过分页器的 aprocess_result 和数据 Schema 输出
+    只有 PostgreSQL、Oracle 等使用服务端游标，MySQL（mysqlclient 默认游标）会在客户端缓存整个结果集，
+    这时只有序列化后的输出是分批的，查询结果占用的内存仍与结果集大小成正比，大结果集需要通过 filter 缩小范围
+    """
+
+    def __init__(
+        self,
+        queryset: QuerySet,
+        stream_format: StreamFormat,
+        item_schema: type | None = None,
+        paginator: AsyncLimitOffsetPagination | AsyncKeysetPagination | None = None,
+        chunk_size: int | None = None,
+    ):
+        self.queryset = queryset
+        self.stream_format = StreamFormat(stream_format)
+        self.item_schema = item_schema
+        self.paginator = paginator
+        self.chunk_size = chunk_size or settings.STREAM_CHUNK_SIZE
+
+    @property
+    def content_type(self) -> str:
+        if self.stream_format == StreamFormat.CSV:
+            return "text/csv; charset=utf-8"
+        return "application/x-ndjson"
+
+    def _dump_items(self, rows: List) -> List[dict]:
+        """按数据 Schema 输出，分页器开启 fast_output 且 dict 数据能快速输出时跳过 Pydantic 校验"""
+        if self.item_schema is None:
+            return rows
+        items = None
+        if self.paginator is not None and self.paginator.fast_output:
+            items = fast_items(self.item_schema, rows)
+        if items is None:
+            items = [self.item_schema.model_validate(row).model_dump() for row in rows]
+        return items
+
+    async def _achunks(self) -> AsyncIterator[List[dict]]:
+        rows = []
+        async for row in self.queryset.aiterator(chunk_size=self.chunk_size):
+            rows.append(row)
+            if len(rows) >= self.chunk_size:
+                yield await self._aprocess(rows)
+                rows = []
+        if rows:
+            yield await self._aprocess(rows)
+
+    async def _aprocess(self, rows: List) -> List[dict]:
+        if self.paginator is not None:
+            rows = await self.paginator.aprocess_result(rows)
+        return self._dump_items(rows)
+
+    async def aiter_content(self, on_error: Callable[[Exception], ErrorResponse]) -> AsyncIterator[bytes]:
+        """
+        逐批输出内容
+        响应头已经发出后出现的异常无法再改写响应，在末尾追加一行错误信息，客户端据此判断输出不完整：
+        NDJSON 追加一行错误响应，CSV 追加一行 #ERROR,错误码,错误消息
+        """
+        try:
+            if self.stream_format == StreamFormat.CSV:
+                async for chunk in self._acsv():
+                    yield chunk
+            else:
+                async for chunk in self._andjson():
+                    yield chunk
+        except Exception as e:
+            error = on_error(e)
+            logger.error(f"流式输出异常 - 错误码:[{error.code}]; 错误消息:[{error.msg}]", exc_info=True)
+            if self.stream_format == StreamFormat.NDJSON:
+                yield orjson_util.dumps_django(error.model_dump()) + b"\n"
+            else:
+                yield csv.writer(_Echo()).writerow([CSV_ERROR_MARKER, error.code, error.msg]).encode("utf-8")
+
+    async def _andjson(self) -> AsyncIterator[bytes]:
+        async for items in self._achunks():
+            yield b"".join(orjson_util.dumps_django(item) + b"\n" for item in items)
+
+    async def _acsv(self) -> AsyncIterator[bytes]:
+        writer = csv.writer(_Echo())
+        header = list(self.item_schema.model_fields) if self.item_schema is not None else None
+        if header is not None:
+            yield ("\ufeff" + writer.writerow(header)).encode("utf-8")  # BOM，Excel 打开中文不乱码
+        async for items in self._achunks():
+            if header is None:
+                header = list(items[0])
+                yield ("\ufeff" + writer.writerow(header)).encode("utf-8")
+            yield "".join(
+                writer.writerow([_csv_value(item.get(name)) for name in header]) for item in items
+            ).encode("utf-8")
+
+
+# ================= 流式输出装饰器 =================
+def streamable(
+    query_func: Callable,
+    pagination_class: Type[AsyncLimitOffsetPagination] | Type[AsyncKeysetPagination] | None = None,
+    item_schema: type | None = None,
+    chunk_size: int | None = None,
+):
+    """
+    传入 format 时调用原始接口 query_func 取得 queryset 并返回 StreamOutput，否则按原逻辑（分页）返回
+    分页接口的 filter/sort 参数在流式输出中同样生效
+    """
+
+    def decorator(func: Callable):
+        @wraps(func)
+        async def wrapper(*args, ninja_stream=None, **kwargs):
+            stream_format = ninja_stream.format if ninja_stream is not None else None
+            if not stream_format:
+                return await func(*args, **kwargs)
+
+            pagination_input = kwargs.pop("ninja_pagination", None)
+            queryset = await query_func(*args, **kwargs)
+
+            paginator = None
+            if pagination_class is not None:
+                paginator = pagination_class()
+                paginator.item_schema = item_schema
+                if pagination_input is not None:
+                    queryset = await paginator.aprepare_queryset(queryset, pagination_input)
+            return StreamOutput(queryset, stream_format, item_schema, paginator, chunk_size)
+
+        return wrapper
+
+    return decorator
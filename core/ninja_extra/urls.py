@@ -3,6 +3,7 @@ from core.conf import settings
 from core.ninja_extra.response_schema import SuccessResponse, ErrorResponse
 
 from core.ninja_extra.api_extra import NinjaAPIExtra
+from core.ninja_extra import metrics
 from core.status_codes import code_dict
 
 
@@ -17,4 +18,6 @@ api = NinjaAPIExtra(
 NINJA_BASE_URL = settings.NINJA_BASE_URL
 urls = [
     path(NINJA_BASE_URL, api.urls),
-]
\ No newline at end of file
+]
+if settings.METRICS_ENABLED:
+    urls.append(path(f"{NINJA_BASE_URL}metrics", metrics.metrics_view))  # Prometheus 指标
\ No newline at end of file
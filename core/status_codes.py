@@ -18,6 +18,9 @@ code_dict = {
     "1": "请求失败",
     "2": "系统配置错误",
     "3": "接口码[{code}]未注册",
+    "4": "分页游标无效，请重新查询",
+    "5": "筛选条件不正确",
+    "6": "不支持按[{field}]排序",
     
     # 100~599 为Http状态码保留码
     
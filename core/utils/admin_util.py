@@ -1,3 +1,6 @@
+from contextlib import contextmanager
+from functools import partial
+from django.db import transaction
 from django.utils.html import format_html
 from django.contrib.admin.models import LogEntry, CHANGE
 from django.utils.encoding import force_str
@@ -37,11 +40,49 @@ def format_avatar(url: str):
 
 
 def log_custom_action(request, obj, msg="执行了自定义操作", action_flag=CHANGE):
-    LogEntry.objects.log_action(
+    """
+    记录自定义操作日志
+    在 log_action_batch 上下文中只收集日志，退出上下文后批量写入，否则立即写入
+    """
+    entry = LogEntry(
         user_id=request.user.pk,
-        content_type_id=ContentType.objects.get_for_model(obj).pk,
-        object_id=obj.pk,
-        object_repr=force_str(obj),
+        content_type_id=ContentType.objects.get_for_model(obj).pk,  # ContentType 在进程内有缓存
+        object_id=str(obj.pk),
+        object_repr=force_str(obj)[:200],
         action_flag=action_flag,
         change_message=msg,
     )
+    entries = getattr(request, "_log_entries", None)
+    if entries is not None:
+        entries.append(entry)
+    else:
+        entry.save()
+
+
+@contextmanager
+def log_action_batch(request):
+    """
+    批量记录自定义操作日志：上下文中调用 log_custom_action 只收集日志，
+    正常退出后一次 bulk_create 写入；处于事务中时在事务提交后写入，事务回滚或异常退出则丢弃
+
+    使用示例：
+    with transaction.atomic(), admin_util.log_action_batch(request):
+        for obj in queryset:
+            admin_util.log_custom_action(request, obj, "审批通过")
+    """
+    if getattr(request, "_log_entries", None) is not None:  # 嵌套使用时由最外层统一写入
+        yield
+        return
+
+    entries = []
+    request._log_entries = entries
+    try:
+        yield
+    finally:
+        del request._log_entries
+    transaction.on_commit(partial(_flush_log_entries, entries))
+
+
+def _flush_log_entries(entries: list[LogEntry]):
+    if entries:
+        LogEntry.objects.bulk_create(entries, batch_size=500)
@@ -24,7 +24,28 @@ def client_logo_path(instance, filename):
         business_path=CLIENT_LOGO_PATH.format(filename=random_filename(filename=filename))
     )
 
+class SoftDeleteManager(models.Manager):
+    """
+    软删除管理器
+    is_delete=False 只返回未删除数据，is_delete=True 只返回已删除数据，is_delete=None 返回全部数据
+    """
+    def __init__(self, is_delete: bool | None = False):
+        super().__init__()
+        self.is_delete = is_delete
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.is_delete is None:
+            return queryset
+        return queryset.filter(is_delete=self.is_delete)
+
+
 class StructureMoelMixin(models.Model):
+    """
+    审计字段 + 软删除
+    objects 只返回未删除数据（用于显式查询），all_objects 返回全部数据，deleted_objects 只返回已删除数据
+    默认管理器、基础管理器都是 all_objects，外键关联访问、唯一性校验等不受软删除过滤影响
+    """
     create_user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         null=True,
@@ -60,8 +81,16 @@ class StructureMoelMixin(models.Model):
 
     is_delete = models.BooleanField(default=False, null=True, verbose_name="是否删除")
 
+    # all_objects 最先声明并作为默认管理器，validate_unique、dumpdata、admin 等按默认管理器查询的地方包含已删除数据
+    # 子类自己定义 Meta 时不会继承这里的 Meta，需要同样配置 default_manager_name/base_manager_name
+    all_objects = models.Manager()  # 不用 SoftDeleteManager：反向关联管理器按默认管理器的类无参创建，会带上 is_delete=False 过滤
+    objects = SoftDeleteManager()
+    deleted_objects = SoftDeleteManager(is_delete=True)
+
     class Meta:
         abstract = True
+        default_manager_name = "all_objects"
+        base_manager_name = "all_objects"
 
 
 # region ******************** 权限 start ******************** #
@@ -9,6 +9,17 @@
 import orjson
 from typing import Any, Union
 
+from django.core.serializers.json import DjangoJSONEncoder
+from pydantic import BaseModel
+
+_django_encoder = DjangoJSONEncoder()
+
+
+def _django_default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    return _django_encoder.default(obj)
+
 
 def dumps(obj: Any, *, indent: int | None = None, ensure_ascii: bool = False) -> str:
     """
@@ -38,6 +49,17 @@ def dumps_bytes(obj: Any, *, indent: int | None = None, ensure_ascii: bool = Fal
     return orjson.dumps(obj, option=option)
 
 
+def dumps_django(obj: Any) -> bytes:
+    """
+    序列化为 bytes，日期时间、Decimal、Pydantic 模型等类型的格式与 NinjaJSONEncoder（ninja 默认渲染器）一致
+    """
+    return orjson.dumps(
+        obj,
+        default=_django_default,
+        option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+    )
+
+
 def loads(s: Union[str, bytes]) -> Any:
     """
     反序列化，类似 json.loads
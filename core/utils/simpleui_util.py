@@ -1,71 +1,104 @@
+import time
+from typing import List, NamedTuple, Optional, Tuple
+
+from django.contrib.auth.models import Permission
+from django.db.models import Prefetch
 from django.http import HttpRequest
+
 from core.auth.models import SimpleuiMenus
+from core.conf import settings
+from core.utils.user_util import UserCache
 
-def get_dynamic_menus(request: HttpRequest):
+
+class MenuItem(NamedTuple):
+    """菜单定义，权限已转换为 app_label.codename"""
+
+    name: str
+    icon: str
+    url: str
+    path: str
+    permissions: frozenset
+
+
+# 菜单缓存失效只在当前进程生效，其它进程最多 SIMPLEUI_MENU_CACHE_TTL 秒后重新读取
+_menu_items: Optional[Tuple[List[MenuItem], float]] = None  # (所有启用的菜单, 过期时间)，菜单、菜单权限变更时清空
+menu_cache = UserCache(settings.SIMPLEUI_MENU_CACHE_SIZE, settings.SIMPLEUI_MENU_CACHE_TTL)  # 用户id -> 菜单树
+
+
+def load_menu_items() -> List[MenuItem]:
+    """一次查询菜单（预取权限及其 content_type），结果缓存到菜单变更或过期为止"""
+    global _menu_items
+    cached = _menu_items
+    if cached is not None and cached[1] > time.monotonic():
+        return cached[0]
+    menus = SimpleuiMenus.objects.filter(is_active=True).order_by('sort_no').prefetch_related(
+        Prefetch("permissions", queryset=Permission.objects.select_related("content_type"))
+    )
+    items = [
+        MenuItem(
+            name=menu.name,
+            icon=menu.icon or '',
+            url=menu.url or '',
+            path=(menu.path or '').strip(),
+            permissions=frozenset(
+                f"{perm.content_type.app_label}.{perm.codename}" for perm in menu.permissions.all()
+            ),
+        )
+        for menu in menus
+    ]
+    _menu_items = (items, time.monotonic() + settings.SIMPLEUI_MENU_CACHE_TTL)
+    return items
+
+
+def build_menus(items: List[MenuItem], user_permissions: set, is_superuser: bool) -> list:
     """
-    从 SimpleuiMenus 表中构建符合 SimpleUI 格式的 menus 配置，支持多级菜单，并根据用户权限进行过滤。
+    构建符合 SimpleUI 格式的 menus 配置，支持多级菜单，并根据用户权限进行过滤。
     超级管理员不受权限限制。
     """
-    user_permissions = request.user.get_all_permissions()
-
-    menus = SimpleuiMenus.objects.filter(is_active=True).order_by('sort_no')
-
     # 构建路径 => 子菜单映射
     children_map = {}
-    path_map = {}
-    for menu in menus:
-        path_map[menu.path] = menu
-        parts = menu.path.strip().split('/')
+    for item in items:
+        parts = item.path.split('/')
         if len(parts) > 1:
             parent_path = '/'.join(parts[:-1])
-            children_map.setdefault(parent_path, []).append(menu)
+            children_map.setdefault(parent_path, []).append(item)
         else:
-            children_map.setdefault(None, []).append(menu)
+            children_map.setdefault(None, []).append(item)
 
     # 权限判断函数
-    def has_permission(menu: SimpleuiMenus) -> bool:
-        # 超级管理员拥有所有权限
-        if request.user.is_superuser:
+    def has_permission(item: MenuItem) -> bool:
+        # 超级管理员拥有所有权限；没设置权限，默认可见
+        if is_superuser or not item.permissions:
             return True
-
-        perms = menu.permissions.all()
-        # 没设置权限，默认可见
-        if not perms:
-            return True
-
-        for perm in perms:
-            perm_str = f"{perm.content_type.app_label}.{perm.codename}"
-            if perm_str in user_permissions:
-                return True
-        return False
+        return not item.permissions.isdisjoint(user_permissions)
 
     # 递归构建菜单节点
-    def build_node(menu: SimpleuiMenus):
-        if menu.path in children_map:
+    def build_node(item: MenuItem):
+        if item.path in children_map:
             # 有子菜单
-            child_nodes = [build_node(child) for child in children_map[menu.path]]
+            child_nodes = [build_node(child) for child in children_map[item.path]]
             # 过滤掉无权限的子菜单
             child_nodes = [node for node in child_nodes if node is not None]
 
             if not child_nodes:
                 # 如果子菜单都没权限，判断本菜单是否有权限
-                if not has_permission(menu):
+                if not has_permission(item):
                     return None
 
             return {
-                "name": menu.name,
-                "icon": menu.icon or '',
+                "name": item.name,
+                "icon": item.icon,
                 "models": child_nodes if child_nodes else None,
-                "url": menu.url if not child_nodes else '',
+                "url": item.url if not child_nodes else '',
             }
         else:
             # 叶子菜单，直接判断权限
-            if not has_permission(menu):
+            if not has_permission(item):
                 return None
             return {
-                "name": menu.name,
-                "icon": menu.icon or '',
-                "url": menu.url or '',
+                "name": item.name,
+                "icon": item.icon,
+                "url": item.url,
             }
 
     # 构建最终菜单树，只保留有权限的顶级节点
@@ -76,5 +109,36 @@ def get_dynamic_menus(request: HttpRequest):
     ]
 
 
+def get_user_menus(user) -> list:
+    """
+    用户的菜单树，按用户缓存，用户、权限组、菜单变更时由信号失效
+    返回的菜单树多个请求共用，使用方不要修改（simpleui 的 menus 标签会先深拷贝）
+    """
+    menus = menu_cache.get(user.pk)
+    if menus is None:
+        user_permissions = set() if user.is_superuser else user.get_all_permissions()
+        menus = build_menus(load_menu_items(), user_permissions, user.is_superuser)
+        menu_cache.set(user.pk, menus)
+    return menus
+
+
+def get_dynamic_menus(request: HttpRequest):
+    """当前用户的菜单树"""
+    return get_user_menus(request.user)
+
+
+def invalidate_user_menus(*uids):
+    """用户权限变更"""
+    menu_cache.invalidate(*uids)
+
+
+def clear_user_menus():
+    """权限组权限变更，影响的用户不确定，清空所有用户的菜单树"""
+    menu_cache.clear()
+
 
-    
\ No newline at end of file
+def clear_menus():
+    """菜单或菜单权限变更"""
+    global _menu_items
+    _menu_items = None
+    menu_cache.clear()
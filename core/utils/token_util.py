@@ -7,12 +7,15 @@
 # version    : python 3.11
 # Description: token工具
 """
+import hashlib
+import threading
 import time
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 
 import orjson
 import jwt
-from jwt import PyJWTError
+from jwt import InvalidTokenError, PyJWTError
 from django.http import HttpRequest, HttpResponse
 
 
@@ -134,4 +137,103 @@ def verify_token(token: str, secret: str) -> dict:
         raise e
 
 
+class VerifiedTokenCache:
+    """
+    已校验 token 缓存，同一个 token 只做一次签名校验
+    key 为 token 摘要，容量满时淘汰最久未使用的；到 exp 后访问即淘汰并按过期处理
+    撤销的 token 在 exp 之前一直拒绝，缓存和撤销表都在进程内
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[bytes, tuple[dict, float, str]] = OrderedDict()  # 摘要 -> (payload, exp, 签名密钥)
+        self._revoked: dict[bytes, float] = {}  # 摘要 -> exp
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def verify(self, token: str, secret: str) -> dict:
+        """
+        校验 token，命中缓存时跳过签名校验
+        :return: dict 解码后的payload，多个请求共用，不要修改
+        :raises jwt.PyJWTError: 校验失败、已过期、已撤销抛出异常
+        """
+        key = self.digest(token)
+        now = time.time()
+        with self._lock:
+            if key in self._revoked:
+                raise InvalidTokenError("token已撤销")
+            entry = self._entries.get(key)
+            if entry is not None:
+                payload, exp, entry_secret = entry
+                if exp > now and entry_secret == secret:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return payload
+                del self._entries[key]
+            self.misses += 1
+
+        payload = verify_token(token, secret)
+        exp = payload.get("exp")
+        if self.maxsize <= 0 or exp is None:  # 没有过期时间的 token 不缓存
+            return payload
+        with self._lock:
+            if key in self._revoked:  # 校验期间被撤销
+                raise InvalidTokenError("token已撤销")
+            self._entries[key] = (payload, float(exp), secret)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return payload
+
+    def revoke(self, token: str):
+        """撤销 token，到 exp 之前都会被拒绝"""
+        key = self.digest(token)
+        try:
+            exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+        except PyJWTError:
+            return
+        now = time.time()
+        with self._lock:
+            self._entries.pop(key, None)
+            if exp is None or exp > now:
+                self._revoked[key] = float(exp) if exp is not None else float("inf")
+            # 顺带清理已过期的撤销记录
+            for revoked_key in [k for k, revoked_exp in self._revoked.items() if revoked_exp <= now]:
+                del self._revoked[revoked_key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "revoked": len(self._revoked),
+        }
+
+
+token_cache = VerifiedTokenCache(settings.TOKEN_CACHE_SIZE)  # 请求处理流水线的 jwt、文档登录阶段共用
+
+
+def verify_token_cached(token: str, secret: str) -> dict:
+    """
+    校验 JWT Token，结果缓存到 exp
+    :param token: str JWT token
+    :param secret: str 签名密钥
+    :return: dict 解码后的payload，多个请求共用，不要修改
+    :raises jwt.PyJWTError: 校验失败、已过期、已撤销抛出异常
+    """
+    return token_cache.verify(token, secret)
+
 
+def revoke_token(token: str):
+    """撤销 token（如退出登录），当前进程内立即生效"""
+    token_cache.revoke(token)
@@ -0,0 +1,120 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : user_util.py
+# Time       : 2025-10-18 23:02:17
+# Author     : lyx
+# version    : python 3.11
+# Description: 按 token 中的 uid 获取用户，进程内 TTL + LRU 缓存，用户保存、权限组变更时由信号失效
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpRequest
+from django.utils.functional import SimpleLazyObject
+
+from core.conf import settings
+
+
+class UserCache:
+    """
+    用户缓存，key 为用户 id，最多缓存 maxsize 个用户，每个用户缓存 ttl 秒
+    缓存的用户对象多个请求共用，权限缓存（_perm_cache）也随之复用，不要在请求中修改
+    失效只在当前进程生效，其它进程最多 ttl 秒后重新读取
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[int, tuple[object, float]] = OrderedDict()  # 用户id -> (用户, 过期时间)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, uid):
+        """返回缓存的用户，没有或已过期返回 None"""
+        with self._lock:
+            entry = self._entries.get(uid)
+            if entry is not None:
+                user, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(uid)
+                    self.hits += 1
+                    return user
+                del self._entries[uid]
+            self.misses += 1
+        return None
+
+    def set(self, uid, user):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[uid] = (user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(uid)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *uids):
+        with self._lock:
+            for uid in uids:
+                self._entries.pop(uid, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL)
+
+
+def _user_queryset():
+    return get_user_model()._default_manager.filter(is_active=True)
+
+
+def get_user(uid):
+    """按用户 id 获取在职用户，不存在或已停用返回 AnonymousUser"""
+    if uid is None:
+        return AnonymousUser()
+    user = user_cache.get(uid)
+    if user is None:
+        user = _user_queryset().filter(pk=uid).first()
+        if user is None:
+            return AnonymousUser()
+        user_cache.set(uid, user)
+    return user
+
+
+async def aget_user(uid):
+    """get_user 的异步版本，命中缓存时不切换线程"""
+    if uid is None:
+        return AnonymousUser()
+    user = user_cache.get(uid)
+    if user is None:
+        user = await _user_queryset().filter(pk=uid).afirst()
+        if user is None:
+            return AnonymousUser()
+        user_cache.set(uid, user)
+    return user
+
+
+def attach_user(request: HttpRequest, uid):
+    """
+    按 token 中的 uid 设置 request.user / request.auser，替换 AuthenticationMiddleware 基于 session 的用户
+    命中缓存时直接赋值，不查 session 表和用户表；未命中时延迟到第一次访问再查询
+    """
+    user = user_cache.get(uid) if uid is not None else AnonymousUser()
+    if user is not None:
+        request.user = user
+    else:
+        request.user = SimpleLazyObject(partial(get_user, uid))
+    request.auser = partial(aget_user, uid)
+
+
+async def aattach_user(request: HttpRequest, uid):
+    """attach_user 的异步版本，直接取得用户，异步视图中可以直接访问 request.user"""
+    request.user = await aget_user(uid)
+    request.auser = partial(aget_user, uid)
@@ -1,3 +1,4 @@
+import tempfile
 from pathlib import Path
 from core.utils.config_util import merge_config
 
@@ -39,20 +40,16 @@ INSTALLED_APPS = [
 # 中间件列表
 # 中间件是在请求和响应过程中处理请求的钩子框架
 MIDDLEWARE = [
-    "core.middlewares.status_code_middleware.StatusCodeMiddleware", # 异常转换中间件
+    # django 内置中间件的异步版本，ASGI 部署时不为每个中间件切换线程
+    "core.middlewares.django_middlewares.SecurityMiddleware",       # 安全相关中间件
+    "core.middlewares.django_middlewares.SessionMiddleware", # 会话中间件
+    "core.middlewares.django_middlewares.CommonMiddleware",          # 通用中间件
+    "core.middlewares.django_middlewares.CsrfViewMiddleware",          # CSRF 保护中间件
+    "core.middlewares.django_middlewares.AuthenticationMiddleware", # 认证中间件
+    "core.middlewares.django_middlewares.MessageMiddleware",   # 消息中间件
+    "core.middlewares.django_middlewares.XFrameOptionsMiddleware", # 点击劫持保护中间件
     
-    "django.middleware.security.SecurityMiddleware",       # 安全相关中间件
-    "django.contrib.sessions.middleware.SessionMiddleware", # 会话中间件
-    "django.middleware.common.CommonMiddleware",          # 通用中间件
-    "django.middleware.csrf.CsrfViewMiddleware",          # CSRF 保护中间件
-    "django.contrib.auth.middleware.AuthenticationMiddleware", # 认证中间件
-    "django.contrib.messages.middleware.MessageMiddleware",   # 消息中间件
-    "django.middleware.clickjacking.XFrameOptionsMiddleware", # 点击劫持保护中间件
-    
-    "core.middlewares.docs_login_middleware.DocsLoginMiddlware", # 文档登录中间件
-    "core.middlewares.admin_login_to_jwt_middleware.AdminLoginToJwtMiddleware", # admin登录中间件
-    "core.middlewares.jwt_middleware.JWTMiddleware", # jwt认证中间件
-    "core.middlewares.simpleui_menus_middleware.SimpleuiMenusMiddlware", # simpleui菜单中间件
+    "core.middlewares.pipeline_middleware.PipelineMiddleware", # 请求处理流水线：状态码转换、文档登录、admin登录转jwt、jwt认证
 ]
 
 # 身份验证后端
@@ -151,6 +148,7 @@ TOKEN_EXPIRE = merge_config("TOKEN_EXPIRE", 7 * 24 * 60 * 60)
 # region ******************** Ninja 文档配置 start ******************** #
 NINJA_BASE_URL = merge_config("NINJA_BASE_URL", "api/")
 NINJA_PAGINATION_CLASS = 'core.ninja_extra.base_pagination.AsyncCustomLimitOffsetPagination'
+METRICS_DIR = merge_config("METRICS_DIR", str(Path(tempfile.gettempdir()) / f"{BASE_DIR.name}_metrics"))  # uvserver 多进程指标目录，默认在系统临时目录
 # endregion ****************** Ninja 文档配置 end ********************* #
 
 
@@ -263,3 +261,10 @@ PERM_PAKC = {
     }
 }
 # endregion ****************** 权限 end ********************* #
+
+# region ******************** 流水号 start ******************** #
+SERIAL_NUMBER_MODES = {
+    "staff.StaffSalary": "segment",  # 工资流水号使用号段模式，批量发放时一次租用即可
+}
+SERIAL_NUMBER_SEGMENT_STEP = merge_config("SERIAL_NUMBER_SEGMENT_STEP", 1000)
+# endregion ****************** 流水号 end ********************* #
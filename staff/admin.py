@@ -18,9 +18,9 @@ from .enums import (
     StaffSalaryTypeChoices,
     StaffIncomeExpenseChoices,
 )
-from .machine import StaffSalaryStateMachine
+from .machine import transition_queryset
 from .models import Staff, StaffSalary
-from .signals.signals import after_salary_audit_pass_signal
+from .signals.signals import after_salary_batch_audit_pass_signal
 
 
 @admin.register(Staff)
@@ -231,20 +231,17 @@ class StaffSalaryAdmin(
         confirm="确定通过选中的记录吗？",
     )
     def batch_pass(modeladmin, request, queryset):
-        count = 0
-        with transaction.atomic():
-            for obj in queryset:
-                sm = StaffSalaryStateMachine(obj, request.user)
-                sm.audit_pass()
-                sm.save_state()
-                count += 1
+        with transaction.atomic(), admin_util.log_action_batch(request):
+            passed = transition_queryset(queryset, "audit_pass", request.user)
+            for obj in passed:
                 admin_util.log_custom_action(request, obj, "审批通过")
-                
-                # 发送审核通过信号
-                after_salary_audit_pass_signal.send(
-                    sender=StaffSalary,
-                    instance=obj,
-                )
+
+            # 发送批量审核通过信号，按员工汇总更新账户
+            after_salary_batch_audit_pass_signal.send(
+                sender=StaffSalary,
+                instances=passed,
+            )
+        count = len(passed)
         messages.success(request, f"{count} 条记录已批量审批通过。")
 
     @admin_util.btn(
@@ -264,7 +261,7 @@ class StaffSalaryAdmin(
             return
 
         count = 0
-        with transaction.atomic():
+        with transaction.atomic(), admin_util.log_action_batch(request):
             for obj in queryset:
                 obj.is_release = True
                 obj.release_user = request.user
@@ -281,15 +278,11 @@ class StaffSalaryAdmin(
         confirm="确定修正选中的记录吗？",
     )
     def batch_correction(modeladmin, request, queryset):
-        count = 0
-        with transaction.atomic():
-            for obj in queryset:
-                sm = StaffSalaryStateMachine(obj, request.user)
-                sm.correction()
-                sm.save_state()
-                count += 1
+        with transaction.atomic(), admin_util.log_action_batch(request):
+            salaries = transition_queryset(queryset, "correction", request.user)
+            for obj in salaries:
                 admin_util.log_custom_action(request, obj, "修正完成")
-        messages.success(request, f"{count} 条记录已批量修正完成。")
+        messages.success(request, f"{len(salaries)} 条记录已批量修正完成。")
 
     @admin_util.btn(
         short_description="批量取消",
@@ -309,15 +302,11 @@ class StaffSalaryAdmin(
                 "只有状态为【未审核】、【待修正】的记录才能进行批量取消,请检查勾选项！",
             )
             return
-        count = 0
-        with transaction.atomic():
-            for obj in queryset:
-                sm = StaffSalaryStateMachine(obj, request.user)
-                sm.cancel()
-                sm.save_state()
-                count += 1
+        with transaction.atomic(), admin_util.log_action_batch(request):
+            salaries = transition_queryset(queryset, "cancel", request.user)
+            for obj in salaries:
                 admin_util.log_custom_action(request, obj, "工资项取消")
-        messages.success(request, f"{count} 条记录已批量取消。")
+        messages.success(request, f"{len(salaries)} 条记录已批量取消。")
 
     @admin_util.btn(
         short_description="批量不通过",
@@ -352,7 +341,6 @@ class StaffSalaryAdmin(
         if not selected:
             return JsonResponse({"status": "error", "msg": "请选择要操作的记录！"})
 
-        count = 0
         BATCH_SIZE = 200  # 可调，避免一次性加载太多对象
         total = queryset.count()
 
@@ -364,14 +352,11 @@ class StaffSalaryAdmin(
                 }
             )
 
-        with transaction.atomic():
-            # 分批迭代 queryset
-            for obj in queryset.iterator(chunk_size=BATCH_SIZE):
-                sm = StaffSalaryStateMachine(obj, request.user, memo)
-                sm.audit_correction()
-                sm.save_state()
-                count += 1
+        with transaction.atomic(), admin_util.log_action_batch(request):
+            salaries = transition_queryset(queryset, "audit_correction", request.user, memo)
+            for obj in salaries:
                 admin_util.log_custom_action(request, obj, "审批不通过")
+        count = len(salaries)
 
         return JsonResponse({"status": "success", "msg": f"{count} 条记录已操作成功"})
 
@@ -408,7 +393,6 @@ class StaffSalaryAdmin(
         if not selected:
             return JsonResponse({"status": "error", "msg": "请选择要操作的记录！"})
 
-        count = 0
         BATCH_SIZE = 200  # 可调，避免一次性加载太多对象
         total = queryset.count()
 
@@ -420,14 +404,11 @@ class StaffSalaryAdmin(
                 }
             )
 
-        # 分批迭代 queryset
-        with transaction.atomic():
-            for obj in queryset.iterator(chunk_size=BATCH_SIZE):
-                sm = StaffSalaryStateMachine(obj, request.user, memo)
-                sm.audit_reject()
-                sm.save_state()
-                count += 1
+        with transaction.atomic(), admin_util.log_action_batch(request):
+            salaries = transition_queryset(queryset, "audit_reject", request.user, memo)
+            for obj in salaries:
                 admin_util.log_custom_action(request, obj, "审批拒绝")
+        count = len(salaries)
 
         return JsonResponse({"status": "success", "msg": f"{count} 条记录已操作成功"})
 
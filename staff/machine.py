@@ -7,8 +7,10 @@
 # Description: 工资状态机（整数枚举 + State + 自动日志）
 """
 
-from transitions import Machine, State
+from transitions import Machine, MachineError, State
 from django.contrib.auth.models import AbstractUser
+from django.db import transaction
+from django.db.models import QuerySet
 from django.utils import timezone
 
 from staff.models import StaffSalary
@@ -118,3 +120,94 @@ class StaffSalaryStateMachine:
             audit_time=timezone.now(),
             audit_memo=self.audit_memo,
         )
+
+
+def _compile_transitions(transitions: list[dict]) -> dict[str, tuple[frozenset[int], int]]:
+    """将状态机流转配置预编译为 trigger -> (允许的源状态, 目标状态)"""
+    table = {}
+    for item in transitions:
+        sources = item["source"]
+        if isinstance(sources, str):
+            sources = [sources]
+        table[item["trigger"]] = (frozenset(int(source) for source in sources), int(item["dest"]))
+    return table
+
+
+# 预编译的状态流转表，批量流转时不再为每条工资构造状态机
+TRANSITION_TABLE = _compile_transitions(StaffSalaryStateMachine.transitions)
+
+
+def transition_queryset(
+    queryset: QuerySet[StaffSalary],
+    trigger: str,
+    audit_user: AbstractUser = None,
+    audit_memo: str = None,
+) -> list[StaffSalary]:
+    """
+    批量状态流转，与 StaffSalaryStateMachine 使用相同的流转规则：
+    1. 一次查询锁定并校验所有工资的源状态
+    2. 一条 UPDATE ... WHERE status IN (...) 修改状态
+    3. 一次 bulk_create 写入全部审核记录
+    任意一条状态不允许流转（包括并发修改导致的状态变化）时抛出 MachineError，整批回滚
+    返回已更新状态的工资列表
+    """
+    from .models import StaffSalaryCa  # 避免循环导入
+
+    if trigger not in TRANSITION_TABLE:
+        raise AttributeError(f"不存在的状态流转: {trigger}")
+    sources, dest = TRANSITION_TABLE[trigger]
+
+    # MySQL 不支持 IN 子查询中使用 LIMIT，切片后的 queryset 先取出主键
+    pks = list(queryset.values_list("pk", flat=True)) if queryset.query.is_sliced else queryset.values("pk")
+
+    with transaction.atomic():
+        salaries = list(
+            StaffSalary.objects.select_for_update()
+            .filter(pk__in=pks)
+            .order_by("pk")
+        )
+        invalid = [salary for salary in salaries if salary.status not in sources]
+        if invalid:
+            raise MachineError(
+                f"无法执行[{trigger}]，以下工资当前状态不允许流转: "
+                + ", ".join(f"{salary.salary_serial_number}({salary.get_status_display()})" for salary in invalid[:10])
+            )
+        if not salaries:
+            return []
+
+        now = timezone.now()
+        data = {"status": dest, "update_time": now}
+        if audit_memo:
+            data["audit_memo"] = audit_memo
+        updated = StaffSalary.objects.filter(
+            pk__in=[salary.pk for salary in salaries], status__in=sources
+        ).update(**data)
+        if updated != len(salaries):
+            raise MachineError(f"无法执行[{trigger}]，工资状态已被其他操作修改，请刷新后重试")
+
+        audit_full_name = getattr(audit_user, "full_name", None)
+        audit_user_phone = getattr(audit_user, "phone", None)
+        StaffSalaryCa.objects.bulk_create(
+            [
+                StaffSalaryCa(
+                    staff_salary=salary,
+                    salary_serial_number=salary.salary_serial_number,
+                    pre_status=salary.status,  # 切换前状态
+                    cur_status=dest,  # 切换后状态
+                    audit_user=audit_user,
+                    audit_full_name=audit_full_name,
+                    audit_user_phone=audit_user_phone,
+                    audit_time=now,
+                    audit_memo=audit_memo,
+                )
+                for salary in salaries
+            ],
+            batch_size=500,
+        )
+
+        for salary in salaries:
+            salary.status = dest
+            salary.update_time = now
+            if audit_memo:
+                salary.audit_memo = audit_memo
+    return salaries
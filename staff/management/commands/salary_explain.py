@@ -0,0 +1,202 @@
+# -*-coding:utf-8 -*-
+
+"""
+# File       : salary_explain.py
+# Time       : 2025-10-18 15:20:47
+# Author     : lyx
+# version    : python 3.11
+# Description: 工资、票据热点查询执行计划检查，出现全表扫描时报错
+"""
+import random
+import re
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.core.management.base import BaseCommand, CommandError
+
+from bill.models import Bill
+from core.auth.models import User
+from core.utils import time_util
+from staff.enums import StaffIncomeExpenseChoices, StaffSalaryStatusChoices, StaffSalaryTypeChoices
+from staff.models import Staff, StaffSalary
+from staff.utils import salary_util
+
+SEED_MEMO = "salary_explain_seed"
+
+
+class Command(BaseCommand):
+    help = "对工资、票据热点查询执行 EXPLAIN，工资表、票据表出现全表扫描时返回错误；--seed 造数在事务中完成并回滚，不会写入数据库"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seed",
+            default=200000,
+            type=int,
+            help="检查前临时造的工资、票据数据条数, 默认200000；数据量小时执行计划说明不了索引是否生效，0 为只使用现有数据",
+        )
+        parser.add_argument(
+            "--staff-count",
+            default=2000,
+            type=int,
+            help="造数时分布的员工数（现有员工不够时临时创建）, 默认2000",
+        )
+        parser.add_argument(
+            "--batch-size",
+            default=5000,
+            type=int,
+            help="造数时每批写入条数, 默认5000",
+        )
+        parser.add_argument(
+            "--verbose-plan",
+            action="store_true",
+            help="输出完整执行计划",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options["seed"]:
+                self.seed(options["seed"], options["staff_count"], options["batch_size"])
+            failures = []
+            for name, queryset, allow_tables in self.hot_queries():
+                if not self.check_plan(name, queryset, allow_tables, options["verbose_plan"]):
+                    failures.append(name)
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(f"以下查询出现全表扫描: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS("所有热点查询均命中索引"))
+
+    def hot_queries(self):
+        """(名称, 查询, 允许全表扫描的表/别名)"""
+        last_month = time_util.last_month(time_util.now())
+        year, month = last_month.year, last_month.month
+        staff_tables = {Staff._meta.db_table, User._meta.db_table}  # 外层遍历在职员工本身就是全量
+
+        staff_queryset = Staff.objects.filter(user__is_active=True)
+        yield (
+            "基础工资发放列表",
+            staff_queryset.annotate(
+                is_release_current_month=salary_util.month_salary_exists(StaffSalaryTypeChoices.BASIC_SALARY, year, month)
+            ).filter(is_release_current_month=False),
+            staff_tables,
+        )
+        yield (
+            "时薪工资发放列表",
+            staff_queryset.annotate(
+                is_release_current_month=salary_util.month_salary_exists(StaffSalaryTypeChoices.HOURLY_SALARY, year, month)
+            ).filter(is_release_current_month=False),
+            staff_tables,
+        )
+        yield (
+            "admin 按状态筛选",
+            StaffSalary.objects.filter(status=StaffSalaryStatusChoices.UNAUDIT).order_by("-create_time")[:100],
+            set(),
+        )
+        yield (
+            "admin 按工资类型、收支筛选",
+            StaffSalary.objects.filter(
+                salary_type=StaffSalaryTypeChoices.BASIC_SALARY,
+                income_expense=StaffIncomeExpenseChoices.INCOME,
+            )[:100],
+            set(),
+        )
+        yield (
+            "admin 按创建时间筛选",
+            StaffSalary.objects.filter(create_time__gte=time_util.now() - timedelta(days=7))[:100],
+            set(),
+        )
+        yield (
+            "票据 admin 按创建时间筛选",
+            Bill.objects.filter(create_time__gte=time_util.now() - timedelta(days=7)).order_by("-create_time")[:100],
+            set(),
+        )
+
+    def check_plan(self, name, queryset, allow_tables, verbose_plan) -> bool:
+        plan, scans = self.explain(queryset)
+        scans = [table for table in scans if table not in allow_tables]
+        if scans:
+            self.stdout.write(self.style.ERROR(f"[FULL SCAN] {name}: {', '.join(scans)}"))
+        else:
+            self.stdout.write(f"[OK] {name}")
+        if verbose_plan or scans:
+            for line in plan:
+                self.stdout.write(f"    {line}")
+        return not scans
+
+    def explain(self, queryset) -> tuple[list[str], list[str]]:
+        """返回 (执行计划文本, 全表扫描的表/别名)"""
+        sql, params = queryset.query.get_compiler(using=queryset.db).as_sql()
+        vendor = connection.vendor
+        with connection.cursor() as cursor:
+            if vendor == "sqlite":
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                plan = [row[-1] for row in cursor.fetchall()]
+                scans = [line.split()[1] for line in plan if line.startswith("SCAN ") and "USING" not in line]
+            elif vendor == "mysql":
+                cursor.execute(f"EXPLAIN {sql}", params)
+                columns = [col[0] for col in cursor.description]
+                rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+                plan = [" ".join(f"{k}={v}" for k, v in row.items()) for row in rows]
+                scans = [row["table"] for row in rows if row["type"] == "ALL"]
+            elif vendor == "postgresql":
+                cursor.execute(f"EXPLAIN {sql}", params)
+                plan = [row[0] for row in cursor.fetchall()]
+                scans = [match.group(1) for line in plan if (match := re.search(r"Seq Scan on (\w+)", line))]
+            else:
+                raise CommandError(f"不支持的数据库: {vendor}")
+        return plan, scans
+
+    def seed_staff_ids(self, staff_count, batch_size) -> list[int]:
+        """造数用的员工 id，现有员工不够时临时创建用户和员工，工资的员工外键指向真实存在的员工"""
+        staff_ids = list(Staff.objects.values_list("id", flat=True)[:staff_count])
+        missing = staff_count - len(staff_ids)
+        if missing > 0:
+            usernames = [f"{SEED_MEMO}_{i}" for i in range(missing)]
+            User.objects.bulk_create(
+                [User(username=username, phone=f"SEED{i:010d}") for i, username in enumerate(usernames)],
+                batch_size=batch_size,
+            )
+            # MySQL 的 bulk_create 不回填主键，重新查询
+            user_ids = User.objects.filter(username__in=usernames).values_list("id", flat=True)
+            Staff.objects.bulk_create(
+                [Staff(user_id=user_id, staff_code=SEED_MEMO) for user_id in user_ids],
+                batch_size=batch_size,
+            )
+            staff_ids += Staff.objects.filter(staff_code=SEED_MEMO).values_list("id", flat=True)
+        return staff_ids
+
+    def seed(self, count, staff_count, batch_size):
+        """临时造数，随事务回滚"""
+        staff_ids = self.seed_staff_ids(staff_count, batch_size)
+        salary_types = list(StaffSalaryTypeChoices.values)
+        statuses = list(StaffSalaryStatusChoices.values)
+        income_expenses = list(StaffIncomeExpenseChoices.values)
+        now = time_util.now()
+        for start in range(0, count, batch_size):
+            StaffSalary.objects.bulk_create([
+                StaffSalary(
+                    staff_id=random.choice(staff_ids),
+                    staff_code="",
+                    full_name="",
+                    phone="",
+                    salary=0,
+                    income_expense=random.choice(income_expenses),
+                    status=random.choice(statuses),
+                    salary_type=random.choice(salary_types),
+                    year=now.year - random.randint(0, 5),
+                    month=random.randint(1, 12),
+                    day=1,
+                    memo=SEED_MEMO,
+                    salary_serial_number=f"EXPLAIN{i:013d}",
+                )
+                for i in range(start, min(start + batch_size, count))
+            ])
+            Bill.objects.bulk_create([
+                Bill(name=SEED_MEMO, is_delete=random.random() < 0.1)  # 约 10% 为已删除票据
+                for _ in range(start, min(start + batch_size, count))
+            ])
+        if connection.vendor != "mysql":  # MySQL 的 ANALYZE TABLE 会隐式提交事务
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {StaffSalary._meta.db_table}")
+                cursor.execute(f"ANALYZE {Bill._meta.db_table}")
+        self.stdout.write(f"已临时造数 {count} 条（工资、票据各 {count} 条）")
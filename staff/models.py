@@ -1,4 +1,3 @@
-from asgiref.sync import sync_to_async
 from datetime import date
 from decimal import Decimal
 from functools import partial
@@ -11,6 +10,14 @@ from staff.enums import (
     StaffSalaryTypeChoices,
 )
 from core.common.generator import sn_generator
+from core.common.sn_pool import get_sn_pool
+
+# 工资流水号生成参数
+SALARY_SN_OPTIONS = {
+    "prefix": "GZ",
+    "used_for": "staff.StaffSalary",
+    "letter_length": 0,
+}
 
 
 class Staff(model_util.PermissionHelperMixin, models.Model):
@@ -50,6 +57,40 @@ class Staff(model_util.PermissionHelperMixin, models.Model):
         return f"{self.staff_code}:{self.user.full_name}"
 
 
+class StaffSalaryManager(model_util.SoftDeleteManager):
+
+    def bulk_create_derived(self, objs: list["StaffSalary"], batch_size: int = 500) -> list["StaffSalary"]:
+        """
+        批量创建工资，工号、姓名、手机号、员工时薪、收支类型、标题按员工信息填充，工资金额保留提交的值
+        （批量发放页面的实发工资已包含账户余额等调整，不按单条保存的规则重新计算）
+        员工及用户信息一次查询，流水号缺失的一次批量生成
+        """
+        from .utils import salary_util  # 避免循环导入
+
+        if not objs:
+            return []
+
+        staff_map = Staff.objects.select_related("user").in_bulk({obj.staff_id for obj in objs})
+        missing_sn = [obj for obj in objs if not obj.salary_serial_number]
+        if missing_sn:
+            for obj, sn in zip(missing_sn, StaffSalary.get_sn(len(missing_sn))):
+                obj.salary_serial_number = sn
+
+        for obj in objs:
+            if not obj.salary:
+                obj.salary = Decimal("0.00")
+            staff = staff_map.get(obj.staff_id)
+            if staff is None:
+                raise Staff.DoesNotExist(f"员工[{obj.staff_id}]不存在")
+            obj.staff = staff
+            salary_util.derive_identity_fields(obj, staff)
+            if obj.salary_type == StaffSalaryTypeChoices.BASIC_SALARY and obj.basic_salary is None:
+                obj.basic_salary = staff.basic_salary
+            obj.title = salary_util.generate_title(obj)
+
+        return self.bulk_create(objs, batch_size=batch_size)
+
+
 class StaffSalary(
     model_util.PermissionHelperMixin, model_util.StructureMoelMixin, models.Model
 ):
@@ -144,15 +185,18 @@ class StaffSalary(
     salary_serial_number = models.CharField(
         max_length=50, verbose_name="工资流水号", unique=True
     )
+
+    objects = StaffSalaryManager()
     
     
     @staticmethod
     def get_sn(count=1):
-        return sn_generator.next_ids(count, prefix="GZ", used_for="staff.StaffSalary", letter_length=0)
+        return sn_generator.next_ids(count, **SALARY_SN_OPTIONS)
     
     @staticmethod
     async def aget_sn(count=1):
-        return sync_to_async(StaffSalary.get_sn)(count)
+        """从异步流水号池中取号"""
+        return await get_sn_pool(**SALARY_SN_OPTIONS).next_ids(count)
     
     def save(self, *args, **kwargs):
         if not self.salary_serial_number:  # 只有保存时才生成
@@ -164,6 +208,23 @@ class StaffSalary(
     class Meta:
         verbose_name = "工资收入支出情况"
         verbose_name_plural = verbose_name
+        default_manager_name = "all_objects"  # 唯一性校验等不跳过已删除数据，见 StructureMoelMixin
+        base_manager_name = "all_objects"
+        # 索引以软删除标记开头，MySQL 不支持部分索引，用组合索引代替
+        indexes = [
+            # 发放列表 Exists 子查询，带上 status 使 exclude 条件也在索引内完成
+            models.Index(
+                fields=["is_delete", "staff", "year", "month", "salary_type", "status"],
+                name="salary_live_staff_ym_idx",
+            ),
+            # admin 列表筛选
+            models.Index(fields=["is_delete", "status", "create_time"], name="salary_live_status_ct_idx"),
+            models.Index(
+                fields=["is_delete", "salary_type", "income_expense", "status"],
+                name="salary_live_type_ie_idx",
+            ),
+            models.Index(fields=["is_delete", "create_time"], name="salary_live_create_time_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"[{self.staff}]:({StaffIncomeExpenseChoices(self.income_expense).label}){StaffSalaryTypeChoices(self.salary_type).label}:{self.salary}"
@@ -11,3 +11,6 @@ from django.dispatch import Signal
 
 # 工资审批通过后
 after_salary_audit_pass_signal = Signal()
+
+# 工资批量审批通过后，参数 instances 为审批通过的工资列表
+after_salary_batch_audit_pass_signal = Signal()
@@ -1,11 +1,14 @@
+from collections import defaultdict
 from decimal import Decimal
-from staff.enums import StaffSalaryTypeChoices
-from staff.models import StaffSalary
+from django.db.models import Case, DecimalField, Exists, F, OuterRef, Value, When
+from staff.enums import StaffSalaryTypeChoices, StaffSalaryStatusChoices, StaffIncomeExpenseChoices, OUT_SALSRY_ENUMS
+from staff.models import Staff, StaffSalary
 
 
 from decimal import Decimal
 from typing import Union
 from datetime import datetime
+from core.utils import time_util
 
 def generate_title(staff_salary: Union[dict, "StaffSalary"]) -> str:
     # 如果传入的是 model 对象，先转成 dict
@@ -16,7 +19,10 @@ def generate_title(staff_salary: Union[dict, "StaffSalary"]) -> str:
         else:
             # 用 __dict__ 简单转（Django 模型用 model_to_dict 更合适）
             from django.forms.models import model_to_dict
+            create_time = staff_salary.create_time
             staff_salary = model_to_dict(staff_salary)
+            # create_time 不可编辑，model_to_dict 不会返回，新建时还未赋值
+            staff_salary["create_time"] = create_time or time_util.now()
     
     # 取值
     salary_type = staff_salary.get("salary_type")
@@ -68,3 +74,129 @@ def generate_title(staff_salary: Union[dict, "StaffSalary"]) -> str:
 
     raise ValueError("无效的工资类型")
 
+
+def get_salary_staff(salary: StaffSalary) -> Staff:
+    """获取工资对应的员工（带用户信息），已加载的员工直接复用，否则一次查询员工和用户"""
+    staff = salary.staff if StaffSalary.staff.is_cached(salary) else None
+    if staff is None or not Staff.user.is_cached(staff):
+        staff = Staff.objects.select_related("user").get(pk=salary.staff_id)
+        salary.staff = staff
+    return staff
+
+
+def derive_identity_fields(salary: StaffSalary, staff: Staff):
+    """
+    新建工资时根据员工信息填充工号、姓名、手机号、员工时薪、收支类型等字段，不改动工资金额
+    """
+    user = staff.user
+
+    # 定义收支类型
+    income_expense = (
+        StaffIncomeExpenseChoices.EXPENSE
+        if salary.salary_type in OUT_SALSRY_ENUMS
+        else StaffIncomeExpenseChoices.INCOME
+    )
+    salary.staff_code = staff.staff_code
+    salary.full_name = user.full_name
+    salary.phone = user.phone
+    salary.income_expense = income_expense
+
+    if salary.salary_type == StaffSalaryTypeChoices.HOURLY_SALARY:
+        salary.staff_hourly_wage = staff.hourly_wage
+
+    # 如果是支出类型的工资，会设置为未发放（方便页面url过滤）
+    if income_expense == StaffIncomeExpenseChoices.EXPENSE:
+        salary.is_release = False
+
+
+def derive_created_salary(salary: StaffSalary, staff: Staff):
+    """
+    新建工资时根据员工信息计算派生字段，保存前调用，保证一次 INSERT 写入全部字段
+    """
+    derive_identity_fields(salary, staff)
+
+    # 时薪工资，会根据时薪和工作时间计算，如果表单上填写了总额会被覆盖掉
+    if salary.salary_type == StaffSalaryTypeChoices.HOURLY_SALARY:
+        salary.salary = salary.hourly_wage * salary.work_hours
+
+    # 基础工资会保存当前时刻员工的基础工资
+    if salary.salary_type == StaffSalaryTypeChoices.BASIC_SALARY:
+        basic_salary = staff.basic_salary
+        account_balance = staff.account_balance
+        max_salary = basic_salary
+        if account_balance < 0:  # 账户余额小于0
+            max_salary = basic_salary + account_balance # 最大可发工资
+        instance_salary = basic_salary if salary.salary == Decimal("0.00") else salary.salary
+        salary.basic_salary = basic_salary
+        salary.salary = instance_salary if instance_salary > max_salary else max_salary
+
+    # 封装好信息后，生产title
+    salary.title = generate_title(salary)
+
+
+def derive_updated_salary(salary: StaffSalary):
+    """
+    编辑工资时重新计算派生字段，保存前调用
+    """
+    # 编辑工资信息，会重新计算时薪工资
+    if salary.salary_type == StaffSalaryTypeChoices.HOURLY_SALARY:
+        amount = salary.hourly_wage * salary.work_hours
+        if salary.salary != amount:
+            salary.salary = amount
+            salary.title = generate_title(salary)
+
+
+def apply_audit_pass_balances(salaries: list[StaffSalary], batch_size: int = 500) -> int:
+    """
+    审核通过后按员工汇总更新账户：收入增加余额，支出减少余额并累加总支出
+    每批员工使用一条 CASE UPDATE，返回更新的员工数
+    """
+    balance_deltas = defaultdict(Decimal)  # 员工id -> 余额变化
+    expenditure_deltas = defaultdict(Decimal)  # 员工id -> 总支出变化
+    for salary in salaries:
+        amount = Decimal(salary.salary)
+        if salary.income_expense == StaffIncomeExpenseChoices.INCOME:  # 收入
+            balance_deltas[salary.staff_id] += amount
+        else:  # 支出
+            balance_deltas[salary.staff_id] -= amount
+            expenditure_deltas[salary.staff_id] += amount
+
+    staff_ids = list(balance_deltas)
+    updated = 0
+    for i in range(0, len(staff_ids), batch_size):
+        batch_ids = staff_ids[i : i + batch_size]
+        updated += Staff.objects.filter(pk__in=batch_ids).update(
+            account_balance=F("account_balance") + _staff_case(batch_ids, balance_deltas),
+            account_total_expenditure=F("account_total_expenditure") + _staff_case(batch_ids, expenditure_deltas),
+        )
+    return updated
+
+
+def _staff_case(staff_ids: list[int], deltas: dict[int, Decimal]) -> Case:
+    """按员工id生成 CASE 表达式，未出现的员工变化为0"""
+    output_field = DecimalField(max_digits=10, decimal_places=2)
+    return Case(
+        *[When(pk=pk, then=Value(deltas[pk], output_field=output_field)) for pk in staff_ids if deltas.get(pk)],
+        default=Value(Decimal("0.00"), output_field=output_field),
+        output_field=output_field,
+    )
+
+
+def month_salary_exists(salary_type: int, year: int, month: int) -> Exists:
+    """
+    员工当月是否已有某类工资（排除已拒绝、已取消），用于 Staff 查询的 annotate
+    条件顺序与索引 salary_live_staff_ym_idx 一致
+    """
+    return Exists(
+        StaffSalary.objects.filter(
+            staff=OuterRef("pk"),
+            year=year,
+            month=month,
+            salary_type=salary_type,
+        ).exclude(
+            status__in=[
+                StaffSalaryStatusChoices.AUDIT_REJECT,
+                StaffSalaryStatusChoices.CANCEL,
+            ]
+        )
+    )
@@ -10,9 +10,8 @@ from asgiref.sync import sync_to_async
 from django.db import transaction
 from core.ninja_extra.api_extra import BaseApi, HttpRequest, Body, BusinessException
 from core.utils import time_util
-from staff.enums import StaffIncomeExpenseChoices, StaffSalaryTypeChoices
+from staff.enums import StaffSalaryTypeChoices
 from staff.models import Staff, StaffSalary
-from staff.utils import salary_util
 from .. import schemas
 
 class View(BaseApi):
@@ -49,46 +48,44 @@ class View(BaseApi):
             for item in staff_arr
         }
 
+        for item in data:
+            max_salary = staff_max_salary_dict.get(item.sid)
+            if item.actual_disbursement < 0 or item.actual_disbursement > max_salary:
+                raise BusinessException(
+                    "001",
+                    {
+                        "full_name": item.full_name,
+                        "max_salary": max_salary,
+                        "salary": item.actual_disbursement,
+                    },
+                )
+
         batch_lst = []
         user = request.user
-        # 在同步事务中同时生成流水号和插入工资
+        # 校验通过后再从异步流水号池中取号，校验失败不消耗流水号
+        serial_numbers = await StaffSalary.aget_sn(len(data))
+
+        # 在同步事务中批量插入工资
         def _create_salaries_and_sns():
             with transaction.atomic():
-                # 批量生成流水号，并写入 SerialNumber 表
-                serial_numbers = StaffSalary.get_sn(len(data))
-
                 for idx, item in enumerate(data):
-                    max_salary = staff_max_salary_dict.get(item.sid)
-                    if item.actual_disbursement < 0 or item.actual_disbursement > max_salary:
-                        raise BusinessException(
-                            "001",
-                            {
-                                "full_name": item.full_name,
-                                "max_salary": max_salary,
-                                "salary": item.actual_disbursement,
-                            },
+                    # 工号、姓名、收支类型、基础工资、标题等派生字段由 bulk_create_derived 统一计算，实发工资保留提交的值
+                    batch_lst.append(
+                        StaffSalary(
+                            staff_id=item.sid,
+                            salary=item.actual_disbursement,
+                            memo=item.memo,
+                            salary_type=StaffSalaryTypeChoices.BASIC_SALARY,
+                            year=now.year,
+                            month=now.month,
+                            salary_serial_number=serial_numbers[idx],
+                            create_time=now,
+                            create_user=user,
                         )
-
-                    salary_data = {
-                        "staff_id": item.sid,
-                        "staff_code": item.staff_code,
-                        "full_name": item.full_name,
-                        "salary": item.actual_disbursement,
-                        "income_expense": StaffIncomeExpenseChoices.INCOME,
-                        "memo": item.memo,
-                        "salary_type": StaffSalaryTypeChoices.BASIC_SALARY,
-                        "year": now.year,
-                        "month": now.month,
-                        "basic_salary": item.basic_salary,
-                        "salary_serial_number": serial_numbers[idx],
-                        "create_time": now,
-                        "create_user": user
-                    }
-                    salary_data["title"] = salary_util.generate_title(salary_data)
-                    batch_lst.append(StaffSalary(**salary_data))
+                    )
 
                 # 批量创建工资流水
-                StaffSalary.objects.bulk_create(batch_lst, batch_size=500)
+                StaffSalary.objects.bulk_create_derived(batch_lst, batch_size=500)
 
         await sync_to_async(_create_salaries_and_sns)()
 
@@ -9,16 +9,25 @@
 """
 from decimal import Decimal
 from typing import Any, Dict
-from django.db.models import Exists, OuterRef, F, QuerySet
+from django.db.models import F, QuerySet
 from core.ninja_extra.api_extra import BaseApi, HttpRequest
-from core.ninja_extra.base_pagination import AsyncLimitOffsetPagination
+from core.ninja_extra.base_pagination import AsyncLimitOffsetPagination, FilterField
 from core.utils import time_util
-from staff.enums import StaffSalaryTypeChoices, StaffSalaryStatusChoices
-from staff.models import Staff, StaffSalary
+from staff.enums import StaffSalaryTypeChoices
+from staff.models import Staff
+from staff.utils import salary_util
 from .. import schemas
 
 
 class Pagination(AsyncLimitOffsetPagination):
+    filter_fields = {
+        "full_name": FilterField("user__full_name__contains", str, "姓名"),
+        "phone": FilterField("user__phone__contains", str, "手机号"),
+        "month": FilterField(None, str, "发放月份，格式 yyyy-mm，默认上个月"),
+    }
+    sort_fields = {"sid": "id"}
+    fast_output = True  # 数据是 .values() 的 dict，工资字段是 Decimal，与 Schema 输出一致
+
     async def aprocess_result(self, results):
         """
         在分页结果返回前，对每一条数据做二次加工
@@ -27,7 +36,7 @@ class Pagination(AsyncLimitOffsetPagination):
             staff_hourly_wage = item.get("hourly_wage", Decimal("0.00"))
 
             hourly_wage = staff_hourly_wage
-            work_hours = 0
+            work_hours = Decimal("0")
 
             item["actual_disbursement"] = Decimal("0.00")
             item["staff_hourly_wage"] = staff_hourly_wage
@@ -37,17 +46,8 @@ class Pagination(AsyncLimitOffsetPagination):
 
     async def afilter_queryset(self, queryset: QuerySet[Staff, Dict[str, Any]], input_filter: Dict):
         """
-        按前端传入的 filter 字典筛选
+        按前端传入的 filter 字典筛选，姓名、手机号已由 filter_fields 处理
         """
-        # 基础条件
-        full_name = input_filter.get("full_name")
-        if full_name:
-            queryset = queryset.filter(user__full_name__contains=full_name)
-
-        phone = input_filter.get("phone")
-        if phone:
-            queryset = queryset.filter(user__phone__contains=phone)
-
         # 年月条件
         month_str = input_filter.get("month")
         if month_str:
@@ -62,19 +62,7 @@ class Pagination(AsyncLimitOffsetPagination):
 
         # 标记是否已经发放过当月工资
         queryset = queryset.annotate(
-            is_release_current_month=Exists(
-                StaffSalary.objects.filter(
-                    staff=OuterRef("pk"),
-                    month=month,
-                    year=year,
-                    salary_type=StaffSalaryTypeChoices.HOURLY_SALARY,
-                ).exclude(
-                    status__in=[
-                        StaffSalaryStatusChoices.AUDIT_REJECT,
-                        StaffSalaryStatusChoices.CANCEL,
-                    ]
-                )
-            )
+            is_release_current_month=salary_util.month_salary_exists(StaffSalaryTypeChoices.HOURLY_SALARY, year, month)
         ).filter(is_release_current_month=False)
 
         return queryset
@@ -88,6 +76,7 @@ class View(BaseApi):
     error_codes = []
     is_pagination = True
     pagination_class = Pagination
+    is_stream = True
 
     @staticmethod
     async def api(request: HttpRequest):